@@ -22,6 +22,7 @@ import pyroomacoustics as pra
 from freqrir.helper import sample_random_receiver_locations, plot_time_rir
 from freqrir.freqrir import frequency_rir
 from freqrir.timerir import time_rir
+from freqrir.metrics import room_metrics
 
 # Experimental setup from (Lehmann 2008)
 rt60_tgt = 0.6  # seconds (s)
@@ -73,6 +74,11 @@ for n_receivers in range(1, 5):
     # print(f"n_receiv: {n_receivers}, pyroomacoustics: {np.mean(py_times)} +/- {np.std(py_times)} s, freqrir: {np.mean(fr_times)} +/- {np.std(fr_times)} s, timerir: {np.mean(tr_times)} +/- {np.std(tr_times)} s")
     print(f"n_receiv: {n_receivers}, pyroomacoustics: {np.mean(py_times)} +/- {np.std(py_times)} s, freqrir: {np.mean(fr_times)} +/- {np.std(fr_times)} s")
 
+# Check the reverberation time of the uniform reflection coefficients.
+metrics = room_metrics(receivers, source, room_dimensions,
+                       betas, sample_frequency)
+print(f"rt60 target: {rt60_tgt} s, freqrir: {np.mean(metrics['rt60'])} s")
+
 rir = time_rir(receivers, source, room_dimensions, betas, points,
                sample_frequency, order=max_order, c=304.8)
 
@@ -1,9 +1,9 @@
 import numpy as np
-from . helper import distance_for_permutations, sample_period_to_meters
+from . helper import distance_for_permutations, sample_period_to_meters, batch_arguments
 import rirbind as rb
 
 
-def frequency_rir(receivers, source, room_dimensions, betas, points, sample_frequency, frequency, c=304.8, T=1E-4, order=-1):
+def frequency_rir(receivers, source, room_dimensions, betas, points, sample_frequency, frequency, c=304.8, T=1E-4, order=-1, dimensions=3, return_grad=False):
     """
     Calculate room impulse response in the frequency domain.
 
@@ -18,13 +18,21 @@ def frequency_rir(receivers, source, room_dimensions, betas, points, sample_freq
         c (float, optional) : Speed of sound (m/s). Defaults to 304.8 m/s (i.e. 1 ft/ms) (Allen 1979).
         T (float, optional) : Sampling period (s). Defaults to 1E-4 s (i.e. 0.1 ms) (Allen 1979).
         order (int, optional) : Maximum order of reflections. Defaults to -1 (i.e. all reflections).
+        dimensions (int, optional) : Room dimensions, 2d or 3d. A 2d room has no reflections from the floor and ceiling. Defaults to 3.
+        return_grad (bool, optional) : Also return the derivative of the pressure with respect to the receiver and source coordinates (omni-directional). Defaults to False.
 
     Returns:
-        pressure (complex) : A pressure wave in the frequency domain.
+        pressure (list[complex] with shape (N,)) : A pressure wave in the frequency domain.
+        receiver_gradient (complex np-array with shape (N,3)) : Derivative of the pressure with respect to the receiver (x,y,z) in meters (m), only if return_grad.
+        source_gradient (complex np-array with shape (N,3)) : Derivative of the pressure with respect to the source (x,y,z) in meters (m), only if return_grad.
 
     Raises:
         ValueError : If source and receiver are too close together (i.e. within 0.5 sampling periods).
+        ValueError : If the room is not 2d or 3d.
     """
+    if dimensions not in (2, 3):
+        raise ValueError("Room dimensions must be either 2d or 3d.")
+
     for receiver in receivers:
         source_receiver_distance = np.linalg.norm(receiver-source)
         if (source_receiver_distance < 0.5):
@@ -33,9 +41,48 @@ def frequency_rir(receivers, source, room_dimensions, betas, points, sample_freq
     direction = 'o'  # Omni-directional source.
     angle = [0, 0]  # No angle.
     isHighPass = 1  # High-pass filter is applied or not.
-    nDimensions = 3  # 2d or 3d.
+
+    if return_grad:
+        rir, receiver_gradient, source_gradient = rb.freq_rir_grad(
+            c, sample_frequency, frequency, receivers, source, room_dimensions, betas, dimensions, order, points)
+        return rir.tolist(), receiver_gradient, source_gradient
 
     rir = rb.freq_rir(c, sample_frequency, frequency, receivers, source,
-                      room_dimensions, betas, angle, isHighPass, nDimensions, order, points, direction)
+                      room_dimensions, betas, angle, isHighPass, dimensions, order, points, direction)
 
     return rir
+
+
+def batch_frequency_rir(receivers, sources, room_dimensions, betas, points, sample_frequency, frequency, order=-1, c=304.8, dimensions=3, threads=-1):
+    """
+    Calculate room impulse responses of a batch of rooms in the frequency domain.
+
+    All the rooms are computed in one native call, which avoids the overhead of a call per room for small rooms and short responses. The rooms are spread across threads by their estimated number of images.
+
+    Args:
+        receivers (list[list[list[float]]] with shape (K,N,3)) : Reciever locations of each room in meters (m).
+        sources (list[list[float]] with shape (K,3)) : Source location of each room in meters (m).
+        room_dimensions (list[list[float]] with shape (K,3)) : Dimensions of each room in meters (m).
+        betas (list[list[float]] with shape (K,6) or (K,)) : Absorbtion coefficients, or reverberation time (T60) in seconds (s), of each room.
+        points (int or list[int] with shape (K,)) : Number of points of each room, -1 is the reverberation time (T60) times the sampling frequency.
+        sample_frequency (float) : Sampling frequency or sampling rate (Hz).
+        frequency (float) : Frequency of interest (Hz).
+        order (int or list[int] with shape (K,), optional) : Maximum order of reflections of each room. Defaults to -1 (i.e. all reflections).
+        c (float, optional) : Speed of sound (m/s). Defaults to 304.8 m/s (i.e. 1 ft/ms) (Allen 1979).
+        dimensions (int, optional) : Room dimensions, 2d or 3d. A 2d room has no reflections from the floor and ceiling. Defaults to 3.
+        threads (int, optional) : Number of threads. Defaults to -1 (i.e. all cores).
+
+    Returns:
+        pressures (complex np-array with shape (K,N)) : Pressure waves in the frequency domain, packed as one row per room.
+
+    Raises:
+        ValueError : If source and receiver are too close together (i.e. within 0.5 sampling periods).
+        ValueError : If the rooms are not 2d or 3d.
+    """
+    receivers, sources, room_dimensions, betas, points, order = batch_arguments(
+        receivers, sources, room_dimensions, betas, points, order, dimensions)
+
+    isHighPass = 1  # High-pass filter is applied or not.
+
+    return rb.batch_freq_rir(c, sample_frequency, frequency, receivers, sources, room_dimensions,
+                             betas, order, points, isHighPass, dimensions, threads)
@@ -0,0 +1,104 @@
+import numpy as np
+import rirbind as rb
+
+
+class RoomGeometry:
+    """
+    Precompiled image sources of a room, for fast re-evaluation of the room impulse response with new absorption coefficients.
+
+    The gain of every image source is a monomial in the six absorption coefficients, with exponents |mx-q|, |mx|, |my-j|, |my|, |mz-k| and |mz| (Allen 1979). The images are grouped by these exponents and rendered once, the room impulse response for any absorption coefficients is then the weighted sum of the rendered groups.
+
+    Every image source is stored rendered, i.e. 2 * round(0.004 * sample_frequency) taps of 8 bytes (1 KB at 16 kHz) per image and receiver. The number of images grows with the cube of `points`, e.g. 2 receivers at 6000 points at 16 kHz in a 3.2 x 4 x 2.7 m room hold about 370 MB of taps, so long responses with many receivers can take several GB.
+
+    Args:
+        receivers (list[list[float]] with shape (N,3)) : Reciever location(s) in meters (m).
+        source (list[float] with shape(3,)) : Source location in meters (m).
+        room_dimensions (list[float] with shape (3,)) : Room dimensions in meters (m).
+        points (int) :  Number of points, which determines precisions of bins.
+        sample_frequency (float) : Sampling frequency or sampling rate (Hz).
+        order (int, optional) : Maximum order of reflections. Defaults to -1 (i.e. all reflections).
+        c (float, optional) : Speed of sound (m/s). Defaults to 304.8 m/s (i.e. 1 ft/ms) (Allen 1979).
+        dimensions (int, optional) : Room dimensions, 2d or 3d. A 2d room has no reflections from the floor and ceiling. Defaults to 3.
+
+    Raises:
+        ValueError : If source and receiver are too close together (i.e. within 0.5 sampling periods).
+        ValueError : If the room is not 2d or 3d.
+        ValueError : If the number of points is not positive, it can not be estimated from the reverberation time without the absorption coefficients.
+
+    Examples:
+        >>> geometry = RoomGeometry([[1, 1, 1]], [2, 3, 2], [3.2, 4, 2.7], 2048, 16000)
+        >>> rir = geometry.time_rir([0.9] * 6) # Same as time_rir(...) with these betas.
+        >>> gradient = geometry.gradient([0.9] * 6) # Derivative with respect to each of the betas.
+    """
+
+    def __init__(self, receivers, source, room_dimensions, points, sample_frequency, order=-1, c=304.8, dimensions=3):
+        if dimensions not in (2, 3):
+            raise ValueError("Room dimensions must be either 2d or 3d.")
+
+        if points <= 0:
+            raise ValueError("Points must be positive.")
+
+        for receiver in receivers:
+            source_receiver_distance = np.linalg.norm(np.array(receiver) - np.array(source))
+            if (source_receiver_distance < 0.5):
+                raise ValueError("Source and reciever are too close to eachother.")
+
+        direction = 'o'  # Omni-directional source.
+        angle = [0, 0]  # No angle.
+        self.isHighPass = 1  # High-pass filter is applied or not.
+
+        self.n_receivers = len(receivers)
+        self.points = points
+        self.sample_frequency = sample_frequency
+        self.exponents, self.groups, self.microphones, self.starts, self.taps = rb.time_rir_basis(
+            c, sample_frequency, receivers, source, room_dimensions, angle, dimensions, order, points, direction)
+
+    def weights(self, betas):
+        """
+        Weight of each group of image sources, i.e. the product of the absorption coefficients raised to the exponents of the group.
+
+        Args:
+            betas (float np-array with shape (6,)) : Absorbtion coefficients. Walls: left, right, front, back, floor, ceiling.
+
+        Returns:
+            weights (float np-array with shape (G,)) : The weight of each group.
+        """
+        betas = np.asarray(betas, dtype=float).reshape(6)
+        return np.prod(betas ** self.exponents, axis=1)
+
+    def time_rir(self, betas):
+        """
+        Calculate room impulse response in the time domain.
+
+        Args:
+            betas (float np-array with shape (6,)) : Absorbtion coefficients. Walls: left, right, front, back, floor, ceiling.
+
+        Returns:
+            pressures (float np-array with shape (N, points)) : A pressure wave in the time domain.
+        """
+        weights = self.weights(betas)[np.newaxis]
+        return self._render(weights)[0]
+
+    def gradient(self, betas):
+        """
+        Calculate the derivative of the room impulse response with respect to the absorption coefficients.
+
+        Args:
+            betas (float np-array with shape (6,)) : Absorbtion coefficients. Walls: left, right, front, back, floor, ceiling.
+
+        Returns:
+            gradient (float np-array with shape (6, N, points)) : Derivative of the pressure wave with respect to each of the betas.
+        """
+        betas = np.asarray(betas, dtype=float).reshape(6)
+        powers = betas ** self.exponents
+        weights = np.empty((6, len(self.exponents)))
+        for i in range(6):
+            # d/dx x^n = n x^(n-1), which is zero for the groups without this wall (n = 0).
+            exponent = self.exponents[:, i]
+            derivative = exponent * betas[i] ** np.maximum(exponent - 1, 0)
+            weights[i] = derivative * np.prod(np.delete(powers, i, axis=1), axis=1)
+        return self._render(weights)
+
+    def _render(self, weights):
+        return rb.basis_rir(self.sample_frequency, weights, self.groups, self.microphones,
+                            self.starts, self.taps, self.n_receivers, self.points, self.isHighPass)
@@ -33,6 +33,57 @@ def distance_for_permutations(receiver, source, room_dimensions, vector_triplet)
     return distances
 
 
+def batch_arguments(receivers, sources, room_dimensions, betas, points, order, dimensions):
+    """ Stack the configurations of a batch of K rooms into arrays for the native batch calls.
+
+    Args:
+        receivers (list[list[list[float]]] with shape (K,N,3)) : Reciever locations of each room in meters (m).
+        sources (list[list[float]] with shape (K,3)) : Source location of each room in meters (m).
+        room_dimensions (list[list[float]] with shape (K,3)) : Dimensions of each room in meters (m).
+        betas (list[list[float]] with shape (K,6) or (K,)) : Absorbtion coefficients, or reverberation time (T60) in seconds (s), of each room.
+        points (int or list[int] with shape (K,)) : Number of points of each room, -1 is the reverberation time (T60) times the sampling frequency.
+        order (int or list[int] with shape (K,)) : Maximum order of reflections of each room, -1 is all reflections.
+        dimensions (int) : Room dimensions, 2d or 3d.
+
+    Returns:
+        arguments (tuple) : The receivers, sources, room dimensions, betas, points and orders as arrays.
+
+    Raises:
+        ValueError : If source and receiver are too close together (i.e. within 0.5 sampling periods).
+        ValueError : If the rooms are not 2d or 3d.
+        ValueError : If the arrays do not have the shapes above, or a number of points or order is invalid.
+    """
+    if dimensions not in (2, 3):
+        raise ValueError("Room dimensions must be either 2d or 3d.")
+
+    receivers = np.asarray(receivers, dtype=float)
+    sources = np.asarray(sources, dtype=float)
+    room_dimensions = np.asarray(room_dimensions, dtype=float)
+    if sources.ndim != 2 or sources.shape[1] != 3:
+        raise ValueError("Sources must have shape (K,3).")
+    if room_dimensions.shape != sources.shape:
+        raise ValueError("Room dimensions must have shape (K,3).")
+    if receivers.ndim != 3 or receivers.shape[0] != len(sources) or receivers.shape[2] != 3:
+        raise ValueError("Receivers must have shape (K,N,3).")
+
+    betas = np.asarray(betas, dtype=float).reshape(len(sources), -1)
+    if betas.shape[1] not in (1, 6):
+        raise ValueError("Betas must have shape (K,6) or (K,).")
+
+    points = np.broadcast_to(np.asarray(points, dtype=np.int32), (len(sources),))
+    order = np.broadcast_to(np.asarray(order, dtype=np.int32), (len(sources),))
+    if np.any((points != -1) & (points <= 0)):
+        raise ValueError("Points must be -1 or positive.")
+    if np.any(order < -1):
+        raise ValueError("Order must be -1 or more.")
+
+    source_receiver_distances = np.linalg.norm(receivers - sources[:, np.newaxis], axis=-1)
+    if np.any(source_receiver_distances < 0.5):
+        raise ValueError("Source and reciever are too close to eachother.")
+
+    return receivers, sources, room_dimensions, betas, points, order
+
+
 def sample_period_to_meters(x, sample_rate, c=304.8):
     """ Convert a measurement from sample periods to meters.
 
@@ -1,6 +1,7 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h> // This is required for more complex type casts between C++ and Python (i.e. std::vector<double> to list)
 #include <pybind11/complex.h>
+#include <pybind11/numpy.h> // This is required to return numpy arrays (i.e. pybind11::array_t<double>) without copying into lists.
 
 /*
 Program     : Room Impulse Response Generator
@@ -67,6 +68,15 @@ Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 #include <cstdlib>
 #include <iostream>
 #include <complex>
+#include <array>
+#include <map>
+#include <algorithm>
+#include <atomic>
+#include <exception>
+#include <functional>
+#include <mutex>
+#include <stdexcept>
+#include <thread>
 
 #define ROUND(x) ((x) >= 0 ? (long)((x) + 0.5) : (long)((x)-0.5))
 
@@ -124,6 +134,178 @@ double sim_microphone(double x, double y, double z, double *angle, char mtype)
 	}
 }
 
+// Load the reflection coefficients, either given per wall or derived from a reverberation time (Sabine).
+void load_betas(double c, const std::vector<double> &LL, const std::vector<double> &beta_input, int nDimension, double *beta, double &reverberation_time)
+{
+	if (beta_input.size() == 1)
+	{
+		double V = LL[0] * LL[1] * LL[2];
+		double S = 2 * (LL[0] * LL[2] + LL[1] * LL[2] + LL[0] * LL[1]);
+		reverberation_time = beta_input[0];
+		if (reverberation_time != 0)
+		{
+			double alfa = 24 * V * log(10.0) / (c * S * reverberation_time);
+			for (int i = 0; i < 6; i++)
+				beta[i] = sqrt(1 - alfa);
+		}
+		else
+		{
+			for (int i = 0; i < 6; i++)
+				beta[i] = 0;
+		}
+	}
+	else
+	{
+		reverberation_time = 0; // Estimated from the reflection coefficients when required.
+		for (int i = 0; i < 6; i++)
+			beta[i] = beta_input[i];
+	}
+
+	if (nDimension == 2)
+	{
+		beta[4] = 0;
+		beta[5] = 0;
+	}
+}
+
+// Number of samples, default is the reverberation time (T_60) times the sampling frequency.
+int estimate_samples(double c, double fs, const std::vector<double> &LL, const std::vector<double> &beta_input, const double *beta, double reverberation_time, int nSamples)
+{
+	if (nSamples == -1)
+	{
+		if (beta_input.size() > 1)
+		{
+			double V = LL[0] * LL[1] * LL[2];
+			double alpha = ((1 - pow(beta[0], 2)) + (1 - pow(beta[1], 2))) * LL[1] * LL[2] +
+						   ((1 - pow(beta[2], 2)) + (1 - pow(beta[3], 2))) * LL[0] * LL[2] +
+						   ((1 - pow(beta[4], 2)) + (1 - pow(beta[5], 2))) * LL[0] * LL[1];
+			reverberation_time = 24 * log(10.0) * V / (c * alpha);
+			if (reverberation_time < 0.128)
+				reverberation_time = 0.128;
+		}
+		nSamples = (int)(reverberation_time * fs);
+	}
+	return nSamples;
+}
+
+// 'Original' high-pass filter as proposed (Allen 1979), applied in place.
+void high_pass_filter(double fs, double *imp, int nSamples)
+{
+	const double W = 2 * M_PI * 100 / fs; // The cut-off frequency equals 100 Hz
+	const double R1 = exp(-W);
+	const double B1 = 2 * R1 * cos(W);
+	const double B2 = -R1 * R1;
+	const double A1 = -(1 + R1);
+	double X0;
+	double Y[3] = {0, 0, 0};
+
+	for (int idx = 0; idx < nSamples; idx++)
+	{
+		X0 = imp[idx];
+		Y[2] = Y[1];
+		Y[1] = Y[0];
+		Y[0] = B1 * Y[1] + B2 * Y[2] + X0;
+		imp[idx] = Y[0] + A1 * Y[1] + R1 * Y[2];
+	}
+}
+
+// An image source, seen from a receiver (Allen 1979).
+struct Image
+{
+	int mx, my, mz; // Image order index along the x,y,z axis.
+	int q, j, k;	// Integer vector triplet.
+	double R[3];	// Position of the image relative to the receiver (Rp + Rm) in sample periods.
+	double dist;	// Distance between the image and the receiver in sample periods.
+};
+
+// Exponents of the reflection coefficients of an image, i.e. |mx-q|, |mx|, |my-j|, |my|, |mz-k| and |mz|.
+inline std::array<int, 6> image_exponents(const Image &image)
+{
+	return {std::abs(image.mx - image.q), std::abs(image.mx), std::abs(image.my - image.j), std::abs(image.my), std::abs(image.mz - image.k), std::abs(image.mz)};
+}
+
+// Image order +/- range along the x, y and z axes, for the images that arrive within nSamples.
+void image_range(const double *L, int nDimension, int nSamples, int *n)
+{
+	for (int idx = 0; idx < 3; idx++)
+		n[idx] = (int)ceil(nSamples / (2 * L[idx]));
+
+	// A 2D room has no images along the z axis, only the ones in the plane of the source (mz = 0, k = 0).
+	if (nDimension == 2)
+		n[2] = 0;
+}
+
+// Absorption coefficient of an image, the powers of the reflection coefficients are only computed once.
+class Reflections
+{
+public:
+	Reflections(const double *beta, const double *L, int nDimension, int nSamples)
+	{
+		int n[3];
+		image_range(L, nDimension, nSamples, n);
+		for (int i = 0; i < 6; i++)
+		{
+			powers[i].resize(n[i / 2] + 2);
+			powers[i][0] = 1;
+			for (size_t idx = 1; idx < powers[i].size(); idx++)
+				powers[i][idx] = powers[i][idx - 1] * beta[i];
+		}
+	}
+
+	double operator()(const Image &image) const
+	{
+		const std::array<int, 6> e = image_exponents(image);
+		return (powers[0][e[0]] * powers[1][e[1]]) * (powers[2][e[2]] * powers[3][e[3]]) * (powers[4][e[4]] * powers[5][e[5]]);
+	}
+
+private:
+	std::vector<double> powers[6]; // powers[i][n] = beta[i]^n.
+};
+
+// Calls callback(image) for every image source of the receiver r (sample periods) within the reflection order, that arrives within nSamples.
+template <class F>
+void for_each_image(const double *r, const double *s, const double *L, int nDimension, int nOrder, int nSamples, F callback)
+{
+	Image image;
+	double Rm[3];
+	int n[3];
+	const int nK = (nDimension == 2) ? 0 : 1; // Range of k, i.e. the image permutations along the z axis.
+
+	image_range(L, nDimension, nSamples, n);
+
+	for (image.mx = -n[0]; image.mx <= n[0]; image.mx++)
+	{
+		Rm[0] = 2 * image.mx * L[0];
+		for (image.my = -n[1]; image.my <= n[1]; image.my++)
+		{
+			Rm[1] = 2 * image.my * L[1];
+			for (image.mz = -n[2]; image.mz <= n[2]; image.mz++)
+			{
+				Rm[2] = 2 * image.mz * L[2];
+				for (image.q = 0; image.q <= 1; image.q++)
+				{
+					image.R[0] = (1 - 2 * image.q) * s[0] - r[0] + Rm[0];
+					for (image.j = 0; image.j <= 1; image.j++)
+					{
+						image.R[1] = (1 - 2 * image.j) * s[1] - r[1] + Rm[1];
+						for (image.k = 0; image.k <= nK; image.k++)
+						{
+							image.R[2] = (1 - 2 * image.k) * s[2] - r[2] + Rm[2];
+							if (std::abs(2 * image.mx - image.q) + std::abs(2 * image.my - image.j) + std::abs(2 * image.mz - image.k) <= nOrder || nOrder == -1)
+							{
+								image.dist = sqrt(image.R[0] * image.R[0] + image.R[1] * image.R[1] + image.R[2] * image.R[2]);
+								// Only the images that reach the receiver within the sample length.
+								if (floor(image.dist) < nSamples)
+									callback(image);
+							}
+						}
+					}
+				}
+			}
+		}
+	}
+}
+
 std::vector<std::vector<double>> time_rir(double c, double fs, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &beta_input, const std::vector<double> &orientation, int isHighPassFilter, int nDimension, int nOrder, int nSamples, char microphone_type)
 {
 	// | Room Impulse Response Generator                                  |\n"
@@ -181,32 +363,7 @@ std::vector<std::vector<double>> time_rir(double c, double fs, const std::vector
 	double angle[2];
 	double reverberation_time;
 
-	if (beta_input.size() == 1)
-	{
-		double V = LL[0] * LL[1] * LL[2];
-		double S = 2 * (LL[0] * LL[2] + LL[1] * LL[2] + LL[0] * LL[1]);
-		reverberation_time = beta_input[0];
-		if (reverberation_time != 0)
-		{
-			double alfa = 24 * V * log(10.0) / (c * S * reverberation_time);
-			// if (alfa > 1)
-			// 	mexErrMsgTxt("Error: The reflection coefficients cannot be calculated using the current "
-			// 	             "room parameters, i.e. room size and reverberation time.\n           Please "
-			// 	             "specify the reflection coefficients or change the room parameters.");
-			for (int i = 0; i < 6; i++)
-				beta[i] = sqrt(1 - alfa);
-		}
-		else
-		{
-			for (int i = 0; i < 6; i++)
-				beta[i] = 0;
-		}
-	}
-	else
-	{
-		for (int i = 0; i < 6; i++)
-			beta[i] = beta_input[i];
-	}
+	load_betas(c, LL, beta_input, nDimension, beta, reverberation_time);
 
 	// 3D Microphone orientation (optional)
 	if (orientation.size())
@@ -220,15 +377,6 @@ std::vector<std::vector<double>> time_rir(double c, double fs, const std::vector
 		angle[1] = 0;
 	}
 
-	// Room Dimension (optional)
-	// if (nDimension != 2 && nDimension != 3)
-	//     mexErrMsgTxt("Invalid input arguments! (9)");
-	if (nDimension == 2)
-	{
-		beta[4] = 0;
-		beta[5] = 0;
-	}
-
 	// Reflection order (optional)
 	if (nOrder < -1)
 	{
@@ -236,148 +384,56 @@ std::vector<std::vector<double>> time_rir(double c, double fs, const std::vector
 	}
 
 	// Number of samples (optional)
-	if (nSamples == -1)
-	{
-		if (beta_input.size() > 1)
-		{
-			double V = LL[0] * LL[1] * LL[2];
-			double alpha = ((1 - pow(beta[0], 2)) + (1 - pow(beta[1], 2))) * LL[1] * LL[2] +
-						   ((1 - pow(beta[2], 2)) + (1 - pow(beta[3], 2))) * LL[0] * LL[2] +
-						   ((1 - pow(beta[4], 2)) + (1 - pow(beta[5], 2))) * LL[0] * LL[1];
-			reverberation_time = 24 * log(10.0) * V / (c * alpha);
-			if (reverberation_time < 0.128)
-				reverberation_time = 0.128;
-		}
-		nSamples = (int)(reverberation_time * fs);
-	}
+	nSamples = estimate_samples(c, fs, LL, beta_input, beta, reverberation_time, nSamples);
 
 	// Create output vector
 	std::vector<std::vector<double>> imp(nMicrophones);
 	for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
 		imp[idxMicrophone].resize(nSamples);
 
-	// Temporary variables and constants (high-pass filter)
-	const double W = 2 * M_PI * 100 / fs; // The cut-off frequency equals 100 Hz
-	const double R1 = exp(-W);
-	const double B1 = 2 * R1 * cos(W);
-	const double B2 = -R1 * R1;
-	const double A1 = -(1 + R1);
-	double X0;
-	double *Y = new double[3];
-
 	// Temporary variables and constants (image-method)
 	const double Fc = 1;				  // The cut-off frequency equals fs/2 - Fc is the normalized cut-off frequency.
 	const int Tw = 2 * ROUND(0.004 * fs); // The width of the low-pass FIR equals 8 ms
 	const double cTs = c / fs;
 	double *LPI = new double[Tw];
-	double *r = new double[3];
-	double *s = new double[3];
-	double *L = new double[3];
-	double Rm[3];
-	double Rp_plus_Rm[3];
-	double refl[6];
-	double fdist, dist;
-	double gain;
-	double b, d; // Beta absorbtion coefficient, distance.
-	int startPosition;
-	int n1, n2, n3;
-	int q, j, k;
-	int mx, my, mz;
-	int n;
-
-	s[0] = ss[0] / cTs;
-	s[1] = ss[1] / cTs;
-	s[2] = ss[2] / cTs;
-	L[0] = LL[0] / cTs;
-	L[1] = LL[1] / cTs;
-	L[2] = LL[2] / cTs;
+	double r[3], s[3], L[3];
+
+	for (int idx = 0; idx < 3; idx++)
+	{
+		s[idx] = ss[idx] / cTs;
+		L[idx] = LL[idx] / cTs;
+	}
+
+	const Reflections reflection(beta, L, nDimension, nSamples);
 
 	for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
 	{
 		// [x_1 x_2 ... x_N y_1 y_2 ... y_N z_1 z_2 ... z_N]
-		r[0] = rr[idxMicrophone][0] / cTs;
-		r[1] = rr[idxMicrophone][1] / cTs;
-		r[2] = rr[idxMicrophone][2] / cTs;
-
-		n1 = (int)ceil(nSamples / (2 * L[0]));
-		n2 = (int)ceil(nSamples / (2 * L[1]));
-		n3 = (int)ceil(nSamples / (2 * L[2]));
+		for (int idx = 0; idx < 3; idx++)
+			r[idx] = rr[idxMicrophone][idx] / cTs;
 
 		// Generate room impulse response
-		for (mx = -n1; mx <= n1; mx++)
-		{
-			refl[0] = pow(beta[1], std::abs(mx));
-			Rm[0] = 2 * mx * L[0];
-			for (my = -n2; my <= n2; my++)
-			{
-				refl[1] = pow(beta[3], std::abs(my));
-				Rm[1] = 2 * my * L[1];
-				for (mz = -n3; mz <= n3; mz++)
-				{
-					refl[2] = pow(beta[5], std::abs(mz));
-					Rm[2] = 2 * mz * L[2];
-					for (q = 0; q <= 1; q++)
-					{
-						Rp_plus_Rm[0] = (1 - 2 * q) * s[0] - r[0] + Rm[0];
-						for (j = 0; j <= 1; j++)
-						{
-							Rp_plus_Rm[1] = (1 - 2 * j) * s[1] - r[1] + Rm[1];
-							for (k = 0; k <= 1; k++)
-							{
-								Rp_plus_Rm[2] = (1 - 2 * k) * s[2] - r[2] + Rm[2];
-								dist = sqrt(pow(Rp_plus_Rm[0], 2) + pow(Rp_plus_Rm[1], 2) + pow(Rp_plus_Rm[2], 2));
-								if (std::abs(2 * mx - q) + std::abs(2 * my - j) + std::abs(2 * mz - k) <= nOrder || nOrder == -1)
-								{
-									fdist = floor(dist);
-									if (fdist < nSamples)
-									{
-										// Only compute when necessary.
-										refl[3] = pow(beta[0], std::abs(mx - q)) * refl[0];
-										refl[4] = pow(beta[2], std::abs(my - j)) * refl[1];
-										refl[5] = pow(beta[4], std::abs(mz - k)) * refl[2];
-										b = refl[4] * refl[5] * refl[6]; // Absorbtion coefficient.
-										d = dist * cTs;					 // Distance in meters (s)
-										gain = sim_microphone(Rp_plus_Rm[0], Rp_plus_Rm[1], Rp_plus_Rm[2], angle, microphone_type) * b / (4 * M_PI * d);
-
-										for (n = 0; n < Tw; n++)
-											LPI[n] = 0.5 * (1 - cos(2 * M_PI * ((n + 1 - (dist - fdist)) / Tw))) * Fc * sinc(M_PI * Fc * (n + 1 - (dist - fdist) - (Tw / 2)));
-
-										startPosition = (int)fdist - (Tw / 2) + 1;
-										for (n = 0; n < Tw; n++)
-											if (startPosition + n >= 0 && startPosition + n < nSamples)
-												imp[idxMicrophone][startPosition + n] += gain * LPI[n];
-									}
-								}
-							}
-						}
-					}
-				}
-			}
-		}
+		for_each_image(r, s, L, nDimension, nOrder, nSamples, [&](const Image &image) {
+			double fdist = floor(image.dist);
+			double b = reflection(image); // Absorbtion coefficient.
+			double d = image.dist * cTs;  // Distance in meters (s)
+			double gain = sim_microphone(image.R[0], image.R[1], image.R[2], angle, microphone_type) * b / (4 * M_PI * d);
+
+			for (int n = 0; n < Tw; n++)
+				LPI[n] = 0.5 * (1 - cos(2 * M_PI * ((n + 1 - (image.dist - fdist)) / Tw))) * Fc * sinc(M_PI * Fc * (n + 1 - (image.dist - fdist) - (Tw / 2)));
+
+			int startPosition = (int)fdist - (Tw / 2) + 1;
+			for (int n = 0; n < Tw; n++)
+				if (startPosition + n >= 0 && startPosition + n < nSamples)
+					imp[idxMicrophone][startPosition + n] += gain * LPI[n];
+		});
 
 		// 'Original' high-pass filter as proposed (Allen 1979).
 		if (isHighPassFilter == 1)
-		{
-			for (int idx = 0; idx < 3; idx++)
-			{
-				Y[idx] = 0;
-			}
-			for (int idx = 0; idx < nSamples; idx++)
-			{
-				X0 = imp[idxMicrophone][idx];
-				Y[2] = Y[1];
-				Y[1] = Y[0];
-				Y[0] = B1 * Y[1] + B2 * Y[2] + X0;
-				imp[idxMicrophone][idx] = Y[0] + A1 * Y[1] + R1 * Y[2];
-			}
-		}
+			high_pass_filter(fs, imp[idxMicrophone].data(), nSamples);
 	}
 
-	delete[] Y;
 	delete[] LPI;
-	delete[] r;
-	delete[] s;
-	delete[] L;
 
 	return imp;
 }
@@ -440,29 +496,160 @@ std::vector<std::complex<double>> freq_rir(double c, double fs, double f, const
 	double angle[2];
 	double reverberation_time;
 
-	if (beta_input.size() == 1)
+	load_betas(c, LL, beta_input, nDimension, beta, reverberation_time);
+
+	// 3D Microphone orientation (optional)
+	if (orientation.size())
 	{
-		double V = LL[0] * LL[1] * LL[2];
-		double S = 2 * (LL[0] * LL[2] + LL[1] * LL[2] + LL[0] * LL[1]);
-		reverberation_time = beta_input[0];
-		if (reverberation_time != 0)
-		{
-			double alfa = 24 * V * log(10.0) / (c * S * reverberation_time);
-			for (int i = 0; i < 6; i++)
-				beta[i] = sqrt(1 - alfa);
-		}
-		else
-		{
-			for (int i = 0; i < 6; i++)
-				beta[i] = 0;
-		}
+		angle[0] = orientation[0];
+		angle[1] = orientation[1];
 	}
 	else
 	{
-		for (int i = 0; i < 6; i++)
-			beta[i] = beta_input[i];
+		angle[0] = 0;
+		angle[1] = 0;
+	}
+
+	// Reflection order (optional)
+	if (nOrder < -1)
+	{
+		// mexErrMsgTxt("Invalid input arguments! (8)");
 	}
 
+	// Number of samples (optional)
+	nSamples = estimate_samples(c, fs, LL, beta_input, beta, reverberation_time, nSamples);
+
+	// Output array.
+	std::vector<std::complex<double>> imp(nMicrophones);
+
+	// Temporary variables and constants (image-method)
+	const std::complex<double> i(0, 1); // i = sqrt(-1)
+	const double w = 2 * M_PI * f;		// Frequency variable in radians.
+	const double cTs = c / fs;			// Conversion term: Speed of sound (c) * Sample periods (T) = Speed of sound (c) / Sample frequency (fs).
+	double r[3], s[3], L[3];
+
+	// Convert measurements from meters to sample periods.
+	for (int idx = 0; idx < 3; idx++)
+	{
+		s[idx] = ss[idx] / cTs;
+		L[idx] = LL[idx] / cTs;
+	}
+
+	const Reflections reflection(beta, L, nDimension, nSamples);
+
+	for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
+	{
+		// [x_1 x_2 ... x_N y_1 y_2 ... y_N z_1 z_2 ... z_N]
+		// Convert measurements from meters to sample periods.
+		for (int idx = 0; idx < 3; idx++)
+			r[idx] = rr[idxMicrophone][idx] / cTs;
+
+		// Generate room impulse response
+		for_each_image(r, s, L, nDimension, nOrder, nSamples, [&](const Image &image) {
+			double b = reflection(image); // Absorption coefficient.
+			double d = image.dist * cTs;  // Distance in meters (m).
+			double t = d / c;			  // Time delay in seconds (s).
+			std::complex<double> attenuation = sim_microphone(image.R[0], image.R[1], image.R[2], angle, microphone_type) * b / (4 * M_PI * d);
+			std::complex<double> time_shift = exp(-i * w * t);
+			imp[idxMicrophone] += attenuation * time_shift;
+		});
+	}
+
+	return imp;
+}
+
+std::vector<std::vector<double>> energy_rir(double c, double fs, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &beta_input, int nDimension, int nOrder, int nSamples)
+{
+	// Computes the energy arriving at one or more omni-directional microphones per sample period.
+	// Each accepted image adds its squared gain to the sample of its arrival, i.e. no low-pass (sinc)
+	// interpolation and no high-pass filter are applied. This is the input for a Schroeder decay curve.
+	//
+	// Input parameters:
+	//  c           : sound velocity in m/s.
+	//  fs          : sampling frequency in Hz.
+	//  r           : M x 3 array specifying the (x,y,z) coordinates of the receiver(s) in m.
+	//  s           : 1 x 3 vector specifying the (x,y,z) coordinates of the source in m.
+	//  L           : 1 x 3 vector specifying the room dimensions (x,y,z) in m.
+	//  beta        : 1 x 6 vector specifying the reflection coefficients or
+	//                beta = reverberation time (T_60) in seconds.
+	//  dim         : room dimension (2 or 3).
+	//  order       : reflection order, -1 is the maximum order.
+	//  nsample     : number of samples to calculate, -1 is T_60*fs.
+	//
+	// Output parameters:
+	//  e           : M x nsample matrix containing the energy per sample period.
+
+	// Load parameters
+	int nMicrophones = rr.size();
+	double beta[6];
+	double reverberation_time;
+
+	load_betas(c, LL, beta_input, nDimension, beta, reverberation_time);
+	nSamples = estimate_samples(c, fs, LL, beta_input, beta, reverberation_time, nSamples);
+
+	// Output array.
+	std::vector<std::vector<double>> energy(nMicrophones);
+	for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
+		energy[idxMicrophone].resize(nSamples);
+
+	// Temporary variables and constants (image-method)
+	const double cTs = c / fs; // Conversion term: Speed of sound (c) / Sample frequency (fs).
+	double r[3], s[3], L[3];
+
+	// Convert measurements from meters to sample periods.
+	for (int idx = 0; idx < 3; idx++)
+	{
+		s[idx] = ss[idx] / cTs;
+		L[idx] = LL[idx] / cTs;
+	}
+
+	const Reflections reflection(beta, L, nDimension, nSamples);
+
+	for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
+	{
+		for (int idx = 0; idx < 3; idx++)
+			r[idx] = rr[idxMicrophone][idx] / cTs;
+
+		for_each_image(r, s, L, nDimension, nOrder, nSamples, [&](const Image &image) {
+			double gain = reflection(image) / (4 * M_PI * image.dist * cTs);
+			energy[idxMicrophone][(int)floor(image.dist)] += gain * gain;
+		});
+	}
+
+	return energy;
+}
+
+pybind11::tuple time_rir_basis(double c, double fs, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &orientation, int nDimension, int nOrder, int nSamples, char microphone_type)
+{
+	// Computes the image sources of one or more microphones in a room, independent of the reflection coefficients.
+	// The gain of every image is a monomial in the reflection coefficients,
+	//  beta_x1^|mx-q| beta_x2^|mx| beta_y1^|my-j| beta_y2^|my| beta_z1^|mz-k| beta_z2^|mz|,
+	// so the images are grouped by their exponents. The room impulse response for any reflection
+	// coefficients is the sum of the rendered images weighted by the monomial of their group (see basis_rir).
+	//
+	// Input parameters:
+	//  c           : sound velocity in m/s.
+	//  fs          : sampling frequency in Hz.
+	//  r           : M x 3 array specifying the (x,y,z) coordinates of the receiver(s) in m.
+	//  s           : 1 x 3 vector specifying the (x,y,z) coordinates of the source in m.
+	//  L           : 1 x 3 vector specifying the room dimensions (x,y,z) in m.
+	//  orientation : direction in which the microphones are pointed (azimuth and elevation in radians).
+	//  dim         : room dimension (2 or 3).
+	//  order       : reflection order, -1 is the maximum order.
+	//  nsample     : number of samples to calculate.
+	//  mtype       : [omnidirectional, subcardioid, cardioid, hypercardioid, bidirectional].
+	//
+	// Output parameters:
+	//  exponents   : G x 6 matrix with the exponents of the reflection coefficients of each group.
+	//  groups      : I vector with the group of each image.
+	//  microphones : I vector with the microphone of each image.
+	//  starts      : I vector with the first sample of each rendered image.
+	//  taps        : I x Tw matrix with the rendered (low-pass filtered) images, without reflections.
+
+	// Load parameters
+	int nMicrophones = rr.size();
+	double angle[2];
+
 	// 3D Microphone orientation (optional)
 	if (orientation.size())
 	{
@@ -475,129 +662,509 @@ std::vector<std::complex<double>> freq_rir(double c, double fs, double f, const
 		angle[1] = 0;
 	}
 
-	if (nDimension == 2)
+	// Temporary variables and constants (image-method)
+	const double Fc = 1;				  // The cut-off frequency equals fs/2 - Fc is the normalized cut-off frequency.
+	const int Tw = 2 * ROUND(0.004 * fs); // The width of the low-pass FIR equals 8 ms
+	const double cTs = c / fs;
+	double r[3], s[3], L[3];
+
+	for (int idx = 0; idx < 3; idx++)
 	{
-		beta[4] = 0;
-		beta[5] = 0;
+		s[idx] = ss[idx] / cTs;
+		L[idx] = LL[idx] / cTs;
 	}
 
-	// Reflection order (optional)
-	if (nOrder < -1)
+	// Count the images and groups first, so the taps (Tw doubles per image) are written directly into the output array.
+	std::map<std::array<int, 6>, int> index; // Group of each exponent tuple.
+	ssize_t nImages = 0;
+	for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
 	{
-		// mexErrMsgTxt("Invalid input arguments! (8)");
+		for (int idx = 0; idx < 3; idx++)
+			r[idx] = rr[idxMicrophone][idx] / cTs;
+
+		for_each_image(r, s, L, nDimension, nOrder, nSamples, [&](const Image &image) {
+			index.emplace(image_exponents(image), (int)index.size());
+			nImages++;
+		});
 	}
 
-	// Number of samples (optional)
-	if (nSamples == -1)
+	// Output arrays.
+	const ssize_t nGroups = index.size();
+	pybind11::array_t<int> exponents_array({nGroups, (ssize_t)6});
+	pybind11::array_t<int> groups_array(nImages);
+	pybind11::array_t<int> microphones_array(nImages);
+	pybind11::array_t<int> starts_array(nImages);
+	pybind11::array_t<double> taps_array({nImages, (ssize_t)Tw});
+	int *exponents = exponents_array.mutable_data();
+	int *groups = groups_array.mutable_data();
+	int *microphones = microphones_array.mutable_data();
+	int *starts = starts_array.mutable_data();
+	double *taps = taps_array.mutable_data();
+
+	for (const auto &group : index)
+		std::copy(group.first.begin(), group.first.end(), exponents + group.second * 6);
+
+	ssize_t idxImage = 0;
+	for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
 	{
-		if (beta_input.size() > 1)
+		for (int idx = 0; idx < 3; idx++)
+			r[idx] = rr[idxMicrophone][idx] / cTs;
+
+		for_each_image(r, s, L, nDimension, nOrder, nSamples, [&](const Image &image) {
+			double fdist = floor(image.dist);
+			double gain = sim_microphone(image.R[0], image.R[1], image.R[2], angle, microphone_type) / (4 * M_PI * image.dist * cTs);
+			double *tap = taps + idxImage * Tw;
+			for (int n = 0; n < Tw; n++)
+				tap[n] = gain * 0.5 * (1 - cos(2 * M_PI * ((n + 1 - (image.dist - fdist)) / Tw))) * Fc * sinc(M_PI * Fc * (n + 1 - (image.dist - fdist) - (Tw / 2)));
+
+			groups[idxImage] = index.at(image_exponents(image));
+			microphones[idxImage] = idxMicrophone;
+			starts[idxImage] = (int)fdist - (Tw / 2) + 1;
+			idxImage++;
+		});
+	}
+
+	return pybind11::make_tuple(exponents_array, groups_array, microphones_array, starts_array, taps_array);
+}
+
+pybind11::array_t<double> basis_rir(double fs, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> weights, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> groups, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> microphones, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> starts, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> taps, int nMicrophones, int nSamples, int isHighPassFilter)
+{
+	// Computes room impulse responses from the image sources of time_rir_basis.
+	//
+	// Input parameters:
+	//  fs          : sampling frequency in Hz.
+	//  weights     : P x G matrix with the weight of each group, e.g. the monomial of the reflection coefficients.
+	//  groups, microphones, starts, taps : image sources (see time_rir_basis).
+	//  nMicrophones: number of microphones (M).
+	//  nsample     : number of samples to calculate.
+	//  hp_filter   : use 0 to disable the high-pass filter.
+	//
+	// Output parameters:
+	//  h           : P x M x nsample array containing the room impulse response(s) of each weighting.
+
+	const ssize_t nWeights = weights.shape(0);
+	const ssize_t nGroups = weights.shape(1);
+	const ssize_t nImages = groups.shape(0);
+	const int Tw = taps.shape(1);
+
+	pybind11::array_t<double> imp({nWeights, (ssize_t)nMicrophones, (ssize_t)nSamples});
+	double *h = imp.mutable_data();
+	std::fill(h, h + nWeights * nMicrophones * nSamples, 0.0);
+
+	const double *w = weights.data();
+	const int *group = groups.data();
+	const int *microphone = microphones.data();
+	const int *start = starts.data();
+	const double *tap = taps.data();
+	double *row;
+	double gain;
+
+	for (ssize_t p = 0; p < nWeights; p++)
+	{
+		for (ssize_t i = 0; i < nImages; i++)
 		{
-			double V = LL[0] * LL[1] * LL[2];
-			double alpha = ((1 - pow(beta[0], 2)) + (1 - pow(beta[1], 2))) * LL[1] * LL[2] +
-						   ((1 - pow(beta[2], 2)) + (1 - pow(beta[3], 2))) * LL[0] * LL[2] +
-						   ((1 - pow(beta[4], 2)) + (1 - pow(beta[5], 2))) * LL[0] * LL[1];
-			reverberation_time = 24 * log(10.0) * V / (c * alpha);
-			if (reverberation_time < 0.128)
-				reverberation_time = 0.128;
+			gain = w[p * nGroups + group[i]];
+			if (gain == 0)
+				continue;
+			row = h + (p * nMicrophones + microphone[i]) * nSamples;
+			for (int n = std::max(0, -start[i]); n < Tw && start[i] + n < nSamples; n++)
+				row[start[i] + n] += gain * tap[i * Tw + n];
 		}
-		nSamples = (int)(reverberation_time * fs);
+
+		// 'Original' high-pass filter as proposed (Allen 1979).
+		if (isHighPassFilter == 1)
+			for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
+				high_pass_filter(fs, h + (p * nMicrophones + idxMicrophone) * nSamples, nSamples);
 	}
 
-	// Output array.
-	std::vector<std::complex<double>> imp(nMicrophones);
+	return imp;
+}
+
+pybind11::tuple time_rir_grad(double c, double fs, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &beta_input, int isHighPassFilter, int nDimension, int nOrder, int nSamples)
+{
+	// Computes the room impulse response of one or more omni-directional microphones in the time domain,
+	// with its derivative with respect to the coordinates of the receiver and the source.
+	// The delay and the 1/d gain of every image are differentiated in the same pass as the response.
+	//
+	// Input parameters:
+	//  c           : sound velocity in m/s.
+	//  fs          : sampling frequency in Hz.
+	//  r           : M x 3 array specifying the (x,y,z) coordinates of the receiver(s) in m.
+	//  s           : 1 x 3 vector specifying the (x,y,z) coordinates of the source in m.
+	//  L           : 1 x 3 vector specifying the room dimensions (x,y,z) in m.
+	//  beta        : 1 x 6 vector specifying the reflection coefficients or
+	//                beta = reverberation time (T_60) in seconds.
+	//  hp_filter   : use 0 to disable the high-pass filter.
+	//  dim         : room dimension (2 or 3).
+	//  order       : reflection order, -1 is the maximum order.
+	//  nsample     : number of samples to calculate, -1 is T_60*fs.
+	//
+	// Output parameters:
+	//  h           : M x nsample matrix containing the calculated room impulse response(s).
+	//  dh_dr       : M x 3 x nsample array containing the derivative of h with respect to the receiver (x,y,z) in m.
+	//  dh_ds       : M x 3 x nsample array containing the derivative of h with respect to the source (x,y,z) in m.
+
+	// Load parameters
+	int nMicrophones = rr.size();
+	double beta[6];
+	double reverberation_time;
+
+	load_betas(c, LL, beta_input, nDimension, beta, reverberation_time);
+	nSamples = estimate_samples(c, fs, LL, beta_input, beta, reverberation_time, nSamples);
+
+	// Output arrays.
+	pybind11::array_t<double> imp({(ssize_t)nMicrophones, (ssize_t)nSamples});
+	pybind11::array_t<double> receiver_grad({(ssize_t)nMicrophones, (ssize_t)3, (ssize_t)nSamples});
+	pybind11::array_t<double> source_grad({(ssize_t)nMicrophones, (ssize_t)3, (ssize_t)nSamples});
+	double *h = imp.mutable_data();
+	double *dh_dr = receiver_grad.mutable_data();
+	double *dh_ds = source_grad.mutable_data();
+	std::fill(h, h + nMicrophones * nSamples, 0.0);
+	std::fill(dh_dr, dh_dr + nMicrophones * 3 * nSamples, 0.0);
+	std::fill(dh_ds, dh_ds + nMicrophones * 3 * nSamples, 0.0);
 
 	// Temporary variables and constants (image-method)
-	const std::complex<double> i(0, 1);					// i = sqrt(-1)
-	const double w = 2 * M_PI * f;						// Frequency variable in radians.
-	double t, d, b;										// Time delay (s), distance (m), absortion coefficient.
-	std::complex<double> attenuation, time_shift, gain; // Attenuation factor A(.) and time delay T(.), product of A(.) x T(.),
-	const double cTs = c / fs;							// Conversion term: Speed of sound (c) * Sample periods (T) = Speed of sound (c) / Sample frequency (fs).
-	double *r = new double[3];
-	double *s = new double[3];
-	double *L = new double[3];
-	double Rm[3];
-	double Rp_plus_Rm[3];
-	double refl[6];		// Absorption coefficient
-	double fdist, dist; // Distance between source and receiver, meters and seconds, respectively.
+	const int Tw = 2 * ROUND(0.004 * fs); // The width of the low-pass FIR equals 8 ms
+	const double cTs = c / fs;
+	double *LPI = new double[Tw];  // Low-pass filter of the image.
+	double *dLPI = new double[Tw]; // Derivative of the low-pass filter with respect to the distance.
+	double r[3], s[3], L[3];
 
-	int n1, n2, n3; // Image order +/- range along x, y, and z axes.
-	int q, j, k;	// Integer vector triplet.
-	int mx, my, mz; // Image order index along the x,y,z axis.
+	for (int idx = 0; idx < 3; idx++)
+	{
+		s[idx] = ss[idx] / cTs;
+		L[idx] = LL[idx] / cTs;
+	}
 
-	// Convert measurements from meters to sample periods.
-	s[0] = ss[0] / cTs;
-	s[1] = ss[1] / cTs;
-	s[2] = ss[2] / cTs;
-	L[0] = LL[0] / cTs;
-	L[1] = LL[1] / cTs;
-	L[2] = LL[2] / cTs;
+	const Reflections reflection(beta, L, nDimension, nSamples);
 
 	for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
 	{
-		// [x_1 x_2 ... x_N y_1 y_2 ... y_N z_1 z_2 ... z_N]
-		// Convert measurements from meters to sample periods.
-		r[0] = rr[idxMicrophone][0] / cTs;
-		r[1] = rr[idxMicrophone][1] / cTs;
-		r[2] = rr[idxMicrophone][2] / cTs;
+		for (int idx = 0; idx < 3; idx++)
+			r[idx] = rr[idxMicrophone][idx] / cTs;
 
-		// Order of reflections in each axis.
-		n1 = (int)ceil(nSamples / (2 * L[0]));
-		n2 = (int)ceil(nSamples / (2 * L[1]));
-		n3 = (int)ceil(nSamples / (2 * L[2]));
+		double *row = h + idxMicrophone * nSamples;
+		double *row_dr = dh_dr + idxMicrophone * 3 * nSamples;
+		double *row_ds = dh_ds + idxMicrophone * 3 * nSamples;
 
-		// Generate room impulse response
-		for (mx = -n1; mx <= n1; mx++)
-		{
-			refl[0] = pow(beta[1], std::abs(mx));
-			Rm[0] = 2 * mx * L[0];
-			for (my = -n2; my <= n2; my++)
+		for_each_image(r, s, L, nDimension, nOrder, nSamples, [&](const Image &image) {
+			const double sign[3] = {1.0 - 2 * image.q, 1.0 - 2 * image.j, 1.0 - 2 * image.k}; // Sign of the source coordinates in the image.
+			double dr[3], ds[3]; // Derivative of the distance (sample periods) with respect to the receiver and source (m).
+			double fdist = floor(image.dist);
+			double gain = reflection(image) / (4 * M_PI * image.dist * cTs);
+
+			for (int idx = 0; idx < 3; idx++)
 			{
-				refl[1] = pow(beta[3], std::abs(my));
-				Rm[1] = 2 * my * L[1];
-				for (mz = -n3; mz <= n3; mz++)
+				dr[idx] = -image.R[idx] / (image.dist * cTs);
+				ds[idx] = sign[idx] * image.R[idx] / (image.dist * cTs);
+			}
+
+			// Hanning windowed sinc centered around the delay, u is the sample relative to the delay.
+			// The derivative of both the 1/d gain and the delay with respect to the distance.
+			for (int n = 0; n < Tw; n++)
+			{
+				double u = n + 1 - (image.dist - fdist) - (Tw / 2);
+				double window = 0.5 * (1 + cos(2 * M_PI * u / Tw));
+				double dwindow = -M_PI / Tw * sin(2 * M_PI * u / Tw);
+				LPI[n] = window * sinc(M_PI * u);
+				dLPI[n] = -LPI[n] / image.dist - (dwindow * sinc(M_PI * u) + window * (u == 0 ? 0 : (cos(M_PI * u) - sinc(M_PI * u)) / u));
+			}
+
+			int startPosition = (int)fdist - (Tw / 2) + 1;
+			for (int n = 0; n < Tw; n++)
+			{
+				if (startPosition + n >= 0 && startPosition + n < nSamples)
 				{
-					refl[2] = pow(beta[5], std::abs(mz));
-					Rm[2] = 2 * mz * L[2];
-					for (q = 0; q <= 1; q++)
+					row[startPosition + n] += gain * LPI[n];
+					for (int idx = 0; idx < 3; idx++)
 					{
-						Rp_plus_Rm[0] = (1 - 2 * q) * s[0] - r[0] + Rm[0];
-						for (j = 0; j <= 1; j++)
-						{
-							Rp_plus_Rm[1] = (1 - 2 * j) * s[1] - r[1] + Rm[1];
-							for (k = 0; k <= 1; k++)
-							{
-								Rp_plus_Rm[2] = (1 - 2 * k) * s[2] - r[2] + Rm[2];
-								dist = sqrt(pow(Rp_plus_Rm[0], 2) + pow(Rp_plus_Rm[1], 2) + pow(Rp_plus_Rm[2], 2));
-								if (std::abs(2 * mx - q) + std::abs(2 * my - j) + std::abs(2 * mz - k) <= nOrder || nOrder == -1)
-								{
-									fdist = floor(dist);  // Time delay sample periods (s).
-									if (fdist < nSamples) // Check impulse will reach the source within the sample length.
-									{
-										// Only compute when necessary.
-										refl[3] = pow(beta[0], std::abs(mx - q)) * refl[0];
-										refl[4] = pow(beta[2], std::abs(my - j)) * refl[1];
-										refl[5] = pow(beta[4], std::abs(mz - k)) * refl[2];
-										b = refl[3] * refl[4] * refl[5]; // Absorption coefficient.
-										d = dist * cTs;					 // Distance in meters (m).
-										t = d / c;						 // Time delay in seconds (s).
-										attenuation = sim_microphone(Rp_plus_Rm[0], Rp_plus_Rm[1], Rp_plus_Rm[2], angle, microphone_type) * b / (4 * M_PI * d);
-										time_shift = exp(-i * w * t);
-										gain = attenuation * time_shift;
-										imp[idxMicrophone] = imp[idxMicrophone] + gain;
-									}
-								}
-							}
-						}
+						row_dr[idx * nSamples + startPosition + n] += gain * dLPI[n] * dr[idx];
+						row_ds[idx * nSamples + startPosition + n] += gain * dLPI[n] * ds[idx];
 					}
 				}
 			}
+		});
+
+		// 'Original' high-pass filter as proposed (Allen 1979), which is linear so it applies to the derivatives too.
+		if (isHighPassFilter == 1)
+		{
+			high_pass_filter(fs, row, nSamples);
+			for (int idx = 0; idx < 3; idx++)
+			{
+				high_pass_filter(fs, row_dr + idx * nSamples, nSamples);
+				high_pass_filter(fs, row_ds + idx * nSamples, nSamples);
+			}
+		}
+	}
+
+	delete[] LPI;
+	delete[] dLPI;
+
+	return pybind11::make_tuple(imp, receiver_grad, source_grad);
+}
+
+pybind11::tuple freq_rir_grad(double c, double fs, double f, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &beta_input, int nDimension, int nOrder, int nSamples)
+{
+	// Computes the room impulse response of one or more omni-directional microphones in the frequency domain,
+	// with its derivative with respect to the coordinates of the receiver and the source.
+	//
+	// Input parameters:
+	//  c           : sound velocity in m/s.
+	//  fs          : sampling frequency in Hz.
+	//  f           : frequency variable in Hz.
+	//  r           : M x 3 array specifying the (x,y,z) coordinates of the receiver(s) in m.
+	//  s           : 1 x 3 vector specifying the (x,y,z) coordinates of the source in m.
+	//  L           : 1 x 3 vector specifying the room dimensions (x,y,z) in m.
+	//  beta        : 1 x 6 vector specifying the reflection coefficients or
+	//                beta = reverberation time (T_60) in seconds.
+	//  dim         : room dimension (2 or 3).
+	//  order       : reflection order, -1 is the maximum order.
+	//  nsample     : number of samples to calculate, -1 is T_60*fs.
+	//
+	// Output parameters:
+	//  H           : M vector containing the calculated room impulse response(s).
+	//  dH_dr       : M x 3 array containing the derivative of H with respect to the receiver (x,y,z) in m.
+	//  dH_ds       : M x 3 array containing the derivative of H with respect to the source (x,y,z) in m.
+
+	// Load parameters
+	int nMicrophones = rr.size();
+	double beta[6];
+	double reverberation_time;
+
+	load_betas(c, LL, beta_input, nDimension, beta, reverberation_time);
+	nSamples = estimate_samples(c, fs, LL, beta_input, beta, reverberation_time, nSamples);
+
+	// Output arrays.
+	pybind11::array_t<std::complex<double>> imp(nMicrophones);
+	pybind11::array_t<std::complex<double>> receiver_grad({(ssize_t)nMicrophones, (ssize_t)3});
+	pybind11::array_t<std::complex<double>> source_grad({(ssize_t)nMicrophones, (ssize_t)3});
+	std::complex<double> *H = imp.mutable_data();
+	std::complex<double> *dH_dr = receiver_grad.mutable_data();
+	std::complex<double> *dH_ds = source_grad.mutable_data();
+	std::fill(H, H + nMicrophones, 0.0);
+	std::fill(dH_dr, dH_dr + nMicrophones * 3, 0.0);
+	std::fill(dH_ds, dH_ds + nMicrophones * 3, 0.0);
+
+	// Temporary variables and constants (image-method)
+	const std::complex<double> i(0, 1); // i = sqrt(-1)
+	const double w = 2 * M_PI * f;		// Frequency variable in radians.
+	const double cTs = c / fs;			// Conversion term: Speed of sound (c) / Sample frequency (fs).
+	double r[3], s[3], L[3];
+
+	for (int idx = 0; idx < 3; idx++)
+	{
+		s[idx] = ss[idx] / cTs;
+		L[idx] = LL[idx] / cTs;
+	}
+
+	const Reflections reflection(beta, L, nDimension, nSamples);
+
+	for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
+	{
+		for (int idx = 0; idx < 3; idx++)
+			r[idx] = rr[idxMicrophone][idx] / cTs;
+
+		for_each_image(r, s, L, nDimension, nOrder, nSamples, [&](const Image &image) {
+			const double sign[3] = {1.0 - 2 * image.q, 1.0 - 2 * image.j, 1.0 - 2 * image.k}; // Sign of the source coordinates in the image.
+			double d = image.dist * cTs; // Distance (m).
+			std::complex<double> gain = reflection(image) / (4 * M_PI * d) * exp(-i * w * d / c); // A(.) x T(.)
+			std::complex<double> dgain = gain * (-1 / d - i * w / c);							  // Derivative with respect to the distance (m).
+			H[idxMicrophone] += gain;
+			for (int idx = 0; idx < 3; idx++)
+			{
+				dH_dr[idxMicrophone * 3 + idx] -= dgain * (image.R[idx] / image.dist);
+				dH_ds[idxMicrophone * 3 + idx] += dgain * (sign[idx] * image.R[idx] / image.dist);
+			}
+		});
+	}
+
+	return pybind11::make_tuple(imp, receiver_grad, source_grad);
+}
+
+// Estimated number of images of a room, i.e. its cost relative to the other rooms of a batch.
+double estimate_images(double c, double fs, const double *LL, int nMicrophones, int nDimension, int nOrder, int nSamples)
+{
+	const double cTs = c / fs;
+	double images = (nDimension == 2) ? 4 : 8;
+	for (int idx = 0; idx < nDimension; idx++)
+		images *= 2 * ceil(nSamples / (2 * LL[idx] / cTs)) + 1;
+	// The reflection order limits the images to the points of an octahedron, |2mx-q| + |2my-j| + |2mz-k| <= order.
+	if (nOrder != -1)
+		images = std::min(images, (nDimension == 2) ? 2.0 * (nOrder + 1) * (nOrder + 1) : 4.0 / 3 * pow(nOrder + 1, 3));
+	return images * nMicrophones;
+}
+
+// Runs work(room) for every room of a batch on nThreads threads, the most expensive rooms first.
+void run_batch(const std::vector<double> &cost, int nThreads, const std::function<void(int)> &work)
+{
+	const int nRooms = cost.size();
+	std::vector<int> order(nRooms);
+	for (int idx = 0; idx < nRooms; idx++)
+		order[idx] = idx;
+	std::sort(order.begin(), order.end(), [&cost](int a, int b) { return cost[a] > cost[b]; });
+
+	if (nThreads <= 0)
+		nThreads = std::max(1, (int)std::thread::hardware_concurrency());
+	nThreads = std::max(1, std::min(nThreads, nRooms));
+
+	// Each thread takes the next most expensive room when it is done, which balances the load across the threads.
+	// An exception is kept for the calling thread, since it may not leave a thread, and stops the remaining rooms.
+	std::atomic<int> next(0);
+	std::exception_ptr error;
+	std::mutex error_mutex;
+	auto worker = [&]() {
+		for (int idx = next++; idx < nRooms; idx = next++)
+		{
+			try
+			{
+				work(order[idx]);
+			}
+			catch (...)
+			{
+				std::lock_guard<std::mutex> lock(error_mutex);
+				if (!error)
+					error = std::current_exception();
+				next = nRooms;
+			}
 		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int idx = 1; idx < nThreads; idx++)
+		threads.emplace_back(worker);
+	worker();
+	for (auto &thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+}
+
+pybind11::tuple batch_time_rir(double c, double fs, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> receivers, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> sources, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> room_dimensions, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> betas, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> orders, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> samples, int isHighPassFilter, int nDimension, int nThreads)
+{
+	// Computes the room impulse responses of K rooms with M omni-directional microphones each in the time domain.
+	//
+	// Input parameters:
+	//  c           : sound velocity in m/s.
+	//  fs          : sampling frequency in Hz.
+	//  r           : K x M x 3 array specifying the (x,y,z) coordinates of the receiver(s) in m.
+	//  s           : K x 3 array specifying the (x,y,z) coordinates of the sources in m.
+	//  L           : K x 3 array specifying the room dimensions (x,y,z) in m.
+	//  beta        : K x 6 array specifying the reflection coefficients or
+	//                K x 1 array specifying the reverberation time (T_60) in seconds.
+	//  order       : K vector specifying the reflection order, -1 is the maximum order.
+	//  nsample     : K vector specifying the number of samples to calculate, -1 is T_60*fs.
+	//  hp_filter   : use 0 to disable the high-pass filter.
+	//  dim         : room dimension (2 or 3).
+	//  threads     : number of threads, 0 or less uses all hardware threads.
+	//
+	// Output parameters:
+	//  h           : packed room impulse responses, room k is h[offsets[k]:offsets[k+1]] with shape M x nsample[k].
+	//  offsets     : K + 1 vector with the offset of each room.
+
+	const int nRooms = receivers.shape(0);
+	const int nMicrophones = receivers.shape(1);
+	const int nBetas = betas.shape(1);
+	const double *rr = receivers.data();
+	const double *ss = sources.data();
+	const double *LL = room_dimensions.data();
+	const double *bb = betas.data();
+	const int *nOrder = orders.data();
+	const int *nSamples = samples.data();
+
+	// Number of samples and cost of each room.
+	std::vector<int> points(nRooms);
+	std::vector<double> cost(nRooms);
+	pybind11::array_t<int64_t> offsets(nRooms + 1);
+	int64_t *offset = offsets.mutable_data();
+	offset[0] = 0;
+	for (int room = 0; room < nRooms; room++)
+	{
+		double beta[6];
+		double reverberation_time;
+		std::vector<double> L(LL + room * 3, LL + room * 3 + 3);
+		std::vector<double> beta_input(bb + room * nBetas, bb + (room + 1) * nBetas);
+		load_betas(c, L, beta_input, nDimension, beta, reverberation_time);
+		points[room] = estimate_samples(c, fs, L, beta_input, beta, reverberation_time, nSamples[room]);
+		if (points[room] < 0)
+			throw std::invalid_argument("Invalid number of samples.");
+		cost[room] = estimate_images(c, fs, L.data(), nMicrophones, nDimension, nOrder[room], points[room]);
+		offset[room + 1] = offset[room] + (int64_t)nMicrophones * points[room];
+	}
+
+	pybind11::array_t<double> imp(offset[nRooms]);
+	double *h = imp.mutable_data();
+
+	{
+		pybind11::gil_scoped_release release;
+		run_batch(cost, nThreads, [&](int room) {
+			std::vector<std::vector<double>> r(nMicrophones);
+			for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
+				r[idxMicrophone].assign(rr + (room * nMicrophones + idxMicrophone) * 3, rr + (room * nMicrophones + idxMicrophone + 1) * 3);
+			std::vector<double> s(ss + room * 3, ss + room * 3 + 3);
+			std::vector<double> L(LL + room * 3, LL + room * 3 + 3);
+			std::vector<double> beta_input(bb + room * nBetas, bb + (room + 1) * nBetas);
+			std::vector<double> angle = {0, 0};
+
+			std::vector<std::vector<double>> rir = time_rir(c, fs, r, s, L, beta_input, angle, isHighPassFilter, nDimension, nOrder[room], points[room], 'o');
+			for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
+				std::copy(rir[idxMicrophone].begin(), rir[idxMicrophone].end(), h + offset[room] + (int64_t)idxMicrophone * points[room]);
+		});
 	}
 
-	// Clean up memory.
-	delete[] r;
-	delete[] s;
-	delete[] L;
+	return pybind11::make_tuple(imp, offsets);
+}
+
+pybind11::array_t<std::complex<double>> batch_freq_rir(double c, double fs, double f, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> receivers, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> sources, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> room_dimensions, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> betas, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> orders, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> samples, int isHighPassFilter, int nDimension, int nThreads)
+{
+	// Computes the room impulse responses of K rooms with M omni-directional microphones each in the frequency domain.
+	// The input parameters are the same as batch_time_rir, with the frequency variable f in Hz.
+	//
+	// Output parameters:
+	//  H           : K x M matrix containing the calculated room impulse response(s).
+
+	const int nRooms = receivers.shape(0);
+	const int nMicrophones = receivers.shape(1);
+	const int nBetas = betas.shape(1);
+	const double *rr = receivers.data();
+	const double *ss = sources.data();
+	const double *LL = room_dimensions.data();
+	const double *bb = betas.data();
+	const int *nOrder = orders.data();
+	const int *nSamples = samples.data();
+
+	// Number of samples and cost of each room.
+	std::vector<int> points(nRooms);
+	std::vector<double> cost(nRooms);
+	for (int room = 0; room < nRooms; room++)
+	{
+		double beta[6];
+		double reverberation_time;
+		std::vector<double> L(LL + room * 3, LL + room * 3 + 3);
+		std::vector<double> beta_input(bb + room * nBetas, bb + (room + 1) * nBetas);
+		load_betas(c, L, beta_input, nDimension, beta, reverberation_time);
+		points[room] = estimate_samples(c, fs, L, beta_input, beta, reverberation_time, nSamples[room]);
+		cost[room] = estimate_images(c, fs, L.data(), nMicrophones, nDimension, nOrder[room], points[room]);
+	}
+
+	pybind11::array_t<std::complex<double>> imp({(ssize_t)nRooms, (ssize_t)nMicrophones});
+	std::complex<double> *H = imp.mutable_data();
+
+	{
+		pybind11::gil_scoped_release release;
+		run_batch(cost, nThreads, [&](int room) {
+			std::vector<std::vector<double>> r(nMicrophones);
+			for (int idxMicrophone = 0; idxMicrophone < nMicrophones; idxMicrophone++)
+				r[idxMicrophone].assign(rr + (room * nMicrophones + idxMicrophone) * 3, rr + (room * nMicrophones + idxMicrophone + 1) * 3);
+			std::vector<double> s(ss + room * 3, ss + room * 3 + 3);
+			std::vector<double> L(LL + room * 3, LL + room * 3 + 3);
+			std::vector<double> beta_input(bb + room * nBetas, bb + (room + 1) * nBetas);
+			std::vector<double> angle = {0, 0};
+
+			std::vector<std::complex<double>> rir = freq_rir(c, fs, f, r, s, L, beta_input, angle, isHighPassFilter, nDimension, nOrder[room], points[room], 'o');
+			std::copy(rir.begin(), rir.end(), H + room * nMicrophones);
+		});
+	}
 
 	return imp;
 }
@@ -607,7 +1174,7 @@ std::vector<std::complex<double>> freq_rir(double c, double fs, double f, const
 // To compile this code run:
 //
 // ```bash
-// c++ -O3 -Wall -shared -std=c++11 -fPIC $(python3 -m pybind11 --includes) rirbind.cpp -o rirbind$(python3-config --extension-suffix)
+// c++ -O3 -Wall -shared -std=c++11 -fPIC -pthread $(python3 -m pybind11 --includes) rirbind.cpp -o rirbind$(python3-config --extension-suffix)
 // ```
 //
 // Examples:
@@ -616,6 +1183,8 @@ std::vector<std::complex<double>> freq_rir(double c, double fs, double f, const
 // >>> import rirbind
 // >>> rirbind.time_rir(343.0, 16000, [[1,1,1]], [1,2,2], [3,3,3], [0.9]*6, [0,0], 1, 3 , -1, 2048, 'o')
 // >>> rirbind.freq_rir(343.0, 16000, 1000, [[1,1,1]], [1,2,2], [3,3,3], [0.9]*6, [0,0], 1, 3 , -1, 2048, 'o')
+// >>> rirbind.energy_rir(343.0, 16000, [[1,1,1]], [1,2,2], [3,3,3], [0.9]*6, 3, -1, 2048)
+// >>> rirbind.batch_time_rir(343.0, 16000, [[[1,1,1]]], [[1,2,2]], [[3,3,3]], [[0.9]*6], [-1], [2048], 1, 3, -1)
 // ```
 //
 
@@ -624,4 +1193,11 @@ PYBIND11_MODULE(rirbind, m)
 	m.doc() = "Computes the response of an acoustic source to one or more microphones in a reverberant room using the image method [1,2]."; // optional module docstring
 	m.def("time_rir", &time_rir, "A function that computes a room impulse repsonse in the time domain.");
 	m.def("freq_rir", &freq_rir, "A function that computes a room impulse repsonse in the frequency domain.");
+	m.def("energy_rir", &energy_rir, "A function that computes the energy arriving per sample period from the image sources.");
+	m.def("time_rir_basis", &time_rir_basis, "A function that computes the image sources of a room grouped by the exponents of the reflection coefficients.");
+	m.def("basis_rir", &basis_rir, "A function that computes room impulse responses in the time domain from weighted image sources.");
+	m.def("time_rir_grad", &time_rir_grad, "A function that computes a room impulse repsonse in the time domain and its derivative with respect to the receiver and source.");
+	m.def("freq_rir_grad", &freq_rir_grad, "A function that computes a room impulse repsonse in the frequency domain and its derivative with respect to the receiver and source.");
+	m.def("batch_time_rir", &batch_time_rir, "A function that computes the room impulse repsonses of many rooms in the time domain.");
+	m.def("batch_freq_rir", &batch_freq_rir, "A function that computes the room impulse repsonses of many rooms in the frequency domain.");
 }
\ No newline at end of file
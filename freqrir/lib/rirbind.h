@@ -1,6 +1,21 @@
 #include <vector>
 #include <complex>
+#include <pybind11/numpy.h>
 
 std::vector<std::vector<double>> time_rir(double c, double fs, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &beta_input, const std::vector<double> &orientation, int isHighPassFilter = 1, int nDimension = 3, int nOrder = -1, int nSamples = -1, char microphone_type = 'o');
 
-std::vector<std::complex<double>> freq_rir(double c, double fs, double f, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &beta_input, const std::vector<double> &orientation, int isHighPassFilter = 1, int nDimension = 3, int nOrder = -1, int nSamples = -1, char microphone_type = 'o');
\ No newline at end of file
+std::vector<std::complex<double>> freq_rir(double c, double fs, double f, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &beta_input, const std::vector<double> &orientation, int isHighPassFilter = 1, int nDimension = 3, int nOrder = -1, int nSamples = -1, char microphone_type = 'o');
+
+std::vector<std::vector<double>> energy_rir(double c, double fs, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &beta_input, int nDimension = 3, int nOrder = -1, int nSamples = -1);
+
+pybind11::tuple time_rir_basis(double c, double fs, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &orientation, int nDimension = 3, int nOrder = -1, int nSamples = -1, char microphone_type = 'o');
+
+pybind11::array_t<double> basis_rir(double fs, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> weights, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> groups, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> microphones, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> starts, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> taps, int nMicrophones, int nSamples, int isHighPassFilter = 1);
+
+pybind11::tuple time_rir_grad(double c, double fs, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &beta_input, int isHighPassFilter = 1, int nDimension = 3, int nOrder = -1, int nSamples = -1);
+
+pybind11::tuple freq_rir_grad(double c, double fs, double f, const std::vector<std::vector<double>> &rr, const std::vector<double> &ss, const std::vector<double> &LL, const std::vector<double> &beta_input, int nDimension = 3, int nOrder = -1, int nSamples = -1);
+
+pybind11::tuple batch_time_rir(double c, double fs, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> receivers, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> sources, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> room_dimensions, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> betas, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> orders, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> samples, int isHighPassFilter = 1, int nDimension = 3, int nThreads = -1);
+
+pybind11::array_t<std::complex<double>> batch_freq_rir(double c, double fs, double f, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> receivers, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> sources, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> room_dimensions, pybind11::array_t<double, pybind11::array::c_style | pybind11::array::forcecast> betas, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> orders, pybind11::array_t<int, pybind11::array::c_style | pybind11::array::forcecast> samples, int isHighPassFilter = 1, int nDimension = 3, int nThreads = -1);
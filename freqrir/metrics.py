@@ -0,0 +1,85 @@
+import numpy as np
+import rirbind as rb
+
+
+def room_metrics(receivers, source, room_dimensions, betas, sample_frequency, points=-1, order=-1, c=304.8, dimensions=3):
+    """
+    Calculate the energy decay curve and standard acoustic parameters of a room.
+
+    The energy decay curve (Schroeder 1965) is integrated directly from the gains and delays of the image sources, i.e. no impulse response is rendered and no high-pass filter is applied.
+
+    Args:
+        receivers (list[list[float]] with shape (N,3)) : Reciever location(s) in meters (m).
+        source (list[float] with shape(3,)) : Source location in meters (m).
+        room_dimensions (list[float] with shape (3,)) : Room dimensions in meters (m).
+        betas (float np-array with shape (6,)) : Absorbtion coefficients. Walls: left, right, front, back, floor, ceiling. A single value is the reverberation time (T60) in seconds (s).
+        sample_frequency (float) : Sampling frequency or sampling rate (Hz).
+        points (int, optional) : Number of points. Defaults to -1 (i.e. the reverberation time (T60) of the room times the sampling frequency).
+        order (int, optional) : Maximum order of reflections. Defaults to -1 (i.e. all reflections).
+        c (float, optional) : Speed of sound (m/s). Defaults to 304.8 m/s (i.e. 1 ft/ms) (Allen 1979).
+        dimensions (int, optional) : Room dimensions, 2d or 3d. A 2d room has no reflections from the floor and ceiling. Defaults to 3.
+
+    Returns:
+        metrics (dict) : The energy decay curve `edc` (dB) with shape (N, points), and the reverberation time `rt60` (s), early decay time `edt` (s), clarity `c50` (dB) and definition `d50` with shape (N,).
+
+    Raises:
+        ValueError : If source and receiver are too close together (i.e. within 0.5 sampling periods).
+        ValueError : If the room is not 2d or 3d.
+    """
+    if dimensions not in (2, 3):
+        raise ValueError("Room dimensions must be either 2d or 3d.")
+
+    for receiver in receivers:
+        source_receiver_distance = np.linalg.norm(np.array(receiver) - np.array(source))
+        if (source_receiver_distance < 0.5):
+            raise ValueError("Source and reciever are too close to eachother.")
+
+    energy = np.array(rb.energy_rir(c, sample_frequency, receivers, source,
+                                    room_dimensions, betas, dimensions, order, points))
+
+    # Schroeder backwards integration.
+    edc = np.cumsum(energy[:, ::-1], axis=1)[:, ::-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        edc_db = 10 * np.log10(edc / edc[:, :1])
+
+    t = np.arange(energy.shape[1]) / sample_frequency
+    rt60 = -60 / decay_slope(edc_db, t, -5, -35)  # T30 (ISO 3382).
+    edt = -60 / decay_slope(edc_db, t, 0, -10)
+
+    # Early energy is the first 50 ms after the direct sound.
+    onset = np.argmax(energy > 0, axis=1)
+    split = onset + int(round(0.05 * sample_frequency))
+    rows = np.arange(energy.shape[0])
+    total = edc[rows, onset]
+    late = np.where(split < energy.shape[1],
+                    edc[rows, np.minimum(split, energy.shape[1] - 1)], 0)
+    early = total - late
+    with np.errstate(divide='ignore'):
+        c50 = 10 * np.log10(early / late)
+    d50 = early / total
+
+    return {'edc': edc_db, 'rt60': rt60, 'edt': edt, 'c50': c50, 'd50': d50}
+
+
+def decay_slope(edc, t, start, stop):
+    """
+    Least squares slope of energy decay curves between two decay levels.
+
+    Args:
+        edc (float np-array with shape (N, points)) : Energy decay curves (dB).
+        t (float np-array with shape (points,)) : Time of each point (s).
+        start (float) : Upper decay level of the fit (dB).
+        stop (float) : Lower decay level of the fit (dB).
+
+    Returns:
+        slope (float np-array with shape (N,)) : Decay rate (dB/s), NaN where the curve does not cover the range.
+    """
+    mask = (edc <= start) & (edc >= stop)
+    n = mask.sum(axis=1)
+    y = np.where(mask, edc, 0)
+    x = np.where(mask, t, 0)
+    sx, sy = x.sum(axis=1), y.sum(axis=1)
+    sxx, sxy = (x * x).sum(axis=1), (x * y).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+    return np.where(n > 1, slope, np.nan)
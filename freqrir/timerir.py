@@ -1,9 +1,9 @@
 import numpy as np
 import rirbind as rb
-from . helper import distance_for_permutations
+from . helper import distance_for_permutations, batch_arguments
 
 
-def time_rir(receivers, source, room_dimensions, betas, points, sample_frequency, order=-1, c=304.8):
+def time_rir(receivers, source, room_dimensions, betas, points, sample_frequency, order=-1, c=304.8, dimensions=3, return_grad=False):
     """
     Calculate room impulse response in the time domain.
 
@@ -14,14 +14,23 @@ def time_rir(receivers, source, room_dimensions, betas, points, sample_frequency
         betas (float np-array with shape (3,2)) : Absorbtion coefficients. Walls: left, right, front, back, floor, ceiling.
         points (int) :  Number of points, which determines precisions of bins.
         sample_frequency (float) : Sampling frequency or sampling rate (Hz).
+        order (int, optional) : Maximum order of reflections. Defaults to -1 (i.e. all reflections).
         c (float, optional) : Speed of sound (m/s). Defaults to 304.8 m/s (i.e. 1 ft/ms) (Allen 1979).
+        dimensions (int, optional) : Room dimensions, 2d or 3d. A 2d room has no reflections from the floor and ceiling. Defaults to 3.
+        return_grad (bool, optional) : Also return the derivative of the pressure with respect to the receiver and source coordinates (omni-directional). Defaults to False.
 
     Returns:
-        pressures (list[complex]) : A pressure wave in the time domain.
+        pressures (list[list[float]] with shape (N, points)) : A pressure wave in the time domain.
+        receiver_gradient (float np-array with shape (N,3,points)) : Derivative of the pressures with respect to the receiver (x,y,z) in meters (m), only if return_grad.
+        source_gradient (float np-array with shape (N,3,points)) : Derivative of the pressures with respect to the source (x,y,z) in meters (m), only if return_grad.
 
     Raises:
         ValueError : If source and receiver are too close together (i.e. within 0.5 sampling periods).
+        ValueError : If the room is not 2d or 3d.
     """
+    if dimensions not in (2, 3):
+        raise ValueError("Room dimensions must be either 2d or 3d.")
+
     for receiver in receivers:
         source_receiver_distance = np.linalg.norm(receiver-source)
         if (source_receiver_distance < 0.5):
@@ -30,14 +39,53 @@ def time_rir(receivers, source, room_dimensions, betas, points, sample_frequency
     direction = 'o'  # Omni-directional source.
     angle = [0, 0]  # No angle.
     isHighPass = 1  # High-pass filter is applied or not.
-    nDimensions = 3  # 2d or 3d.
+
+    if return_grad:
+        rir, receiver_gradient, source_gradient = rb.time_rir_grad(
+            c, sample_frequency, receivers, source, room_dimensions, betas, isHighPass, dimensions, order, points)
+        return rir.tolist(), receiver_gradient, source_gradient
 
     rir = rb.time_rir(c, sample_frequency, receivers, source,
-                      room_dimensions, betas, angle, isHighPass, nDimensions, order, points, direction)
+                      room_dimensions, betas, angle, isHighPass, dimensions, order, points, direction)
 
     return rir
 
 
+def batch_time_rir(receivers, sources, room_dimensions, betas, points, sample_frequency, order=-1, c=304.8, dimensions=3, threads=-1):
+    """
+    Calculate room impulse responses of a batch of rooms in the time domain.
+
+    All the rooms are computed in one native call, which avoids the overhead of a call per room for small rooms and short responses. The rooms are spread across threads by their estimated number of images.
+
+    Args:
+        receivers (list[list[list[float]]] with shape (K,N,3)) : Reciever locations of each room in meters (m).
+        sources (list[list[float]] with shape (K,3)) : Source location of each room in meters (m).
+        room_dimensions (list[list[float]] with shape (K,3)) : Dimensions of each room in meters (m).
+        betas (list[list[float]] with shape (K,6) or (K,)) : Absorbtion coefficients, or reverberation time (T60) in seconds (s), of each room.
+        points (int or list[int] with shape (K,)) : Number of points of each room, -1 is the reverberation time (T60) times the sampling frequency.
+        sample_frequency (float) : Sampling frequency or sampling rate (Hz).
+        order (int or list[int] with shape (K,), optional) : Maximum order of reflections of each room. Defaults to -1 (i.e. all reflections).
+        c (float, optional) : Speed of sound (m/s). Defaults to 304.8 m/s (i.e. 1 ft/ms) (Allen 1979).
+        dimensions (int, optional) : Room dimensions, 2d or 3d. A 2d room has no reflections from the floor and ceiling. Defaults to 3.
+        threads (int, optional) : Number of threads. Defaults to -1 (i.e. all cores).
+
+    Returns:
+        pressures (float np-array) : Packed pressure waves in the time domain, room k is pressures[offsets[k]:offsets[k+1]].reshape(N, -1).
+        offsets (int np-array with shape (K+1,)) : Offset of each room in the pressures.
+
+    Raises:
+        ValueError : If source and receiver are too close together (i.e. within 0.5 sampling periods).
+        ValueError : If the rooms are not 2d or 3d.
+    """
+    receivers, sources, room_dimensions, betas, points, order = batch_arguments(
+        receivers, sources, room_dimensions, betas, points, order, dimensions)
+
+    isHighPass = 1  # High-pass filter is applied or not.
+
+    return rb.batch_time_rir(c, sample_frequency, receivers, sources, room_dimensions,
+                             betas, order, points, isHighPass, dimensions, threads)
+
+
 def time_rir_slow(receiver, source, room_dimensions, betas, points, sample_frequency, c=304.8):
     """
     Calculate room impulse response in the time domain.
@@ -30,6 +30,9 @@ ext_modules = [
     Pybind11Extension("rirbind",
                       ["freqrir/lib/rirbind.cpp"],
                       define_macros=[('VERSION_INFO', __version__)],
+                      # std::thread is used to compute batches of rooms in parallel.
+                      extra_compile_args=[] if sys.platform == "win32" else ["-pthread"],
+                      extra_link_args=[] if sys.platform == "win32" else ["-pthread"],
                       ),
 ]
 
@@ -2,7 +2,7 @@ import unittest
 import time
 import numpy as np
 import pyroomacoustics as pra
-from freqrir.freqrir import frequency_rir
+from freqrir.freqrir import frequency_rir, batch_frequency_rir
 from freqrir.helper import sample_random_receiver_locations
 
 
@@ -44,6 +44,65 @@ class TestFreqrir(unittest.TestCase):
         rir = frequency_rir(receivers, source, room_dimensions,
                             betas, points, sample_frequency, frequency)
 
+    def test_2d_matches_3d_without_floor_and_ceiling(self):
+        """ Test a 2d room matches a 3d room with fully absorbing floor and ceiling. """
+        source = np.array([2, 3, 2])
+        receivers = np.array([[1.1, 1, 1.2], [2.5, 1, 1.0]])
+        room_dimensions = np.array([3.2, 4, 2.7])
+        sample_frequency = 16000
+        points = 4096
+        frequency = 1000
+        for order in [-1, 5]:
+            rir_3d = frequency_rir(receivers, source, room_dimensions, [0.9, 0.85, 0.8, 0.75, 0, 0],
+                                   points, sample_frequency, frequency, order=order)
+            rir_2d = frequency_rir(receivers, source, room_dimensions, [0.9, 0.85, 0.8, 0.75, 0.7, 0.7],
+                                   points, sample_frequency, frequency, order=order, dimensions=2)
+            np.testing.assert_allclose(rir_2d, rir_3d, rtol=1e-9)
+
+    def test_gradient_matches_finite_differences(self):
+        """ Test the gradient with respect to the receiver and source against central differences. """
+        source = np.array([2., 3., 2.])
+        receivers = np.array([[1.1, 1, 1.2], [2.5, 1, 1.0]])
+        room_dimensions = np.array([3.2, 4, 2.7])
+        betas = [0.9, 0.85, 0.8, 0.75, 0.7, 0.65]
+        points, sample_frequency, frequency = 2048, 16000, 1000
+        rir, receiver_gradient, source_gradient = frequency_rir(
+            receivers, source, room_dimensions, betas, points, sample_frequency, frequency, return_grad=True)
+        np.testing.assert_allclose(rir, frequency_rir(
+            receivers, source, room_dimensions, betas, points, sample_frequency, frequency), rtol=1e-12)
+        self.assertIsInstance(rir, list)  # Same type as without return_grad.
+        self.assertEqual(receiver_gradient.shape, (2, 3))
+
+        eps = 1e-6
+        for axis in range(3):
+            step = np.zeros(3)
+            step[axis] = eps
+            dr = (np.array(frequency_rir(receivers + step, source, room_dimensions, betas, points, sample_frequency, frequency)) -
+                  np.array(frequency_rir(receivers - step, source, room_dimensions, betas, points, sample_frequency, frequency))) / (2 * eps)
+            ds = (np.array(frequency_rir(receivers, source + step, room_dimensions, betas, points, sample_frequency, frequency)) -
+                  np.array(frequency_rir(receivers, source - step, room_dimensions, betas, points, sample_frequency, frequency))) / (2 * eps)
+            np.testing.assert_allclose(receiver_gradient[:, axis], dr, atol=1e-6)
+            np.testing.assert_allclose(source_gradient[:, axis], ds, atol=1e-6)
+
+    def test_batch_matches_frequency_rir(self):
+        """ Test the room impulse responses of a batch of rooms match a call of frequency_rir per room. """
+        receivers = np.array([[[1.1, 1, 1.2], [2.5, 1, 1.0]],
+                              [[1, 1, 1], [1.5, 2, 1]],
+                              [[0.5, 0.5, 0.5], [3, 3, 2]]])
+        sources = np.array([[2, 3, 2], [2, 2, 2], [3, 1, 1]])
+        room_dimensions = np.array([[3.2, 4, 2.7], [3, 3, 3], [4, 5, 3]])
+        betas = np.array([[0.9] * 6, [0.8, 0.8, 0.7, 0.7, 0.6, 0.6], [0.5] * 6])
+        sample_frequency = 16000
+        frequency = 1000
+        order = [-1, 4, 10]
+        rirs = batch_frequency_rir(receivers, sources, room_dimensions, betas, 1024,
+                                   sample_frequency, frequency, order=order, threads=2)
+        self.assertEqual(rirs.shape, (3, 2))
+        for k in range(len(sources)):
+            rir = frequency_rir(receivers[k], sources[k], room_dimensions[k], betas[k],
+                                1024, sample_frequency, frequency, order=order[k])
+            np.testing.assert_allclose(rirs[k], rir, rtol=1e-12)
+
     def test_faster_than_pyroom(self):
         """ Test that the frequency rir generator is faster than pyroomacoustics. """
         rt60_tgt = 0.6  # seconds (s)
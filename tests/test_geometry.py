@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+from freqrir.geometry import RoomGeometry
+from freqrir.timerir import time_rir
+
+
+class TestGeometry(unittest.TestCase):
+    def setUp(self):
+        self.source = np.array([2, 3, 2])
+        self.receivers = np.array([[1.1, 1, 1.2], [2.5, 1, 1.0]])
+        self.room_dimensions = np.array([3.2, 4, 2.7])
+        self.sample_frequency = 16000
+        self.points = 2048
+        self.betas = np.array([0.9, 0.85, 0.8, 0.75, 0.7, 0.65])
+
+    def test_source_and_reciever_too_close(self):
+        """ Test that a ValueError is raised when the source and receiver are too close together. """
+        with self.assertRaises(ValueError):
+            RoomGeometry([self.source], self.source, self.room_dimensions,
+                         self.points, self.sample_frequency)
+
+    def test_points_must_be_positive(self):
+        """ Test that a ValueError is raised when the number of points is not given, it can not be estimated without the betas. """
+        with self.assertRaises(ValueError):
+            RoomGeometry(self.receivers, self.source, self.room_dimensions,
+                         -1, self.sample_frequency)
+
+    def test_matches_time_rir(self):
+        """ Test the geometry evaluates to the same room impulse response for different betas. """
+        geometry = RoomGeometry(self.receivers, self.source, self.room_dimensions,
+                                self.points, self.sample_frequency, order=10)
+        for betas in [self.betas, [0.92] * 6, [0.5, 0.6, 0.7, 0.8, 0.9, 1.0]]:
+            rir = time_rir(self.receivers, self.source, self.room_dimensions,
+                           betas, self.points, self.sample_frequency, order=10)
+            np.testing.assert_allclose(geometry.time_rir(betas), rir, atol=1e-12)
+
+    def test_matches_2d_time_rir(self):
+        """ Test the geometry of a 2d room evaluates to the same room impulse response. """
+        geometry = RoomGeometry(self.receivers, self.source, self.room_dimensions,
+                                self.points, self.sample_frequency, dimensions=2)
+        rir = time_rir(self.receivers, self.source, self.room_dimensions,
+                       self.betas, self.points, self.sample_frequency, dimensions=2)
+        np.testing.assert_allclose(geometry.time_rir(self.betas), rir, atol=1e-12)
+
+    def test_gradient_matches_finite_differences(self):
+        """ Test the analytic gradient with respect to the betas against finite differences. """
+        geometry = RoomGeometry(self.receivers, self.source, self.room_dimensions,
+                                self.points, self.sample_frequency)
+        gradient = geometry.gradient(self.betas)
+        self.assertEqual(gradient.shape, (6, len(self.receivers), self.points))
+        eps = 1e-6
+        rir = geometry.time_rir(self.betas)
+        for i in range(6):
+            betas = self.betas.copy()
+            betas[i] += eps
+            finite_difference = (geometry.time_rir(betas) - rir) / eps
+            np.testing.assert_allclose(gradient[i], finite_difference, atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
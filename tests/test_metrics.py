@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+from freqrir.metrics import room_metrics
+from freqrir.timerir import time_rir
+
+
+class TestMetrics(unittest.TestCase):
+    def test_source_and_reciever_too_close(self):
+        """ Test that a ValueError is raised when the source and receiver are too close together. """
+        source = np.array([1, 1, 1])
+        receivers = np.array([[1, 1, 1]])
+        room_dimensions = np.array([5, 5, 5])
+        betas = [0.92] * 6
+        with self.assertRaises(ValueError):
+            room_metrics(receivers, source, room_dimensions, betas, 8000)
+
+    def test_rt60_close_to_sabine(self):
+        """ Test the reverberation time from the energy decay curve is close to the Sabine estimate. """
+        room_dimensions = [3.2, 4, 2.7]  # meters (m)
+        source = [2, 3, 2]
+        receivers = [[1.1, 1, 1.2], [2.5, 1, 1.0]]
+        betas = [0.92] * 6
+        c = 304.8
+        metrics = room_metrics(receivers, source, room_dimensions, betas, 16000, c=c)
+
+        V = np.prod(room_dimensions)
+        S = 2 * (room_dimensions[0] * room_dimensions[1] + room_dimensions[1]
+                 * room_dimensions[2] + room_dimensions[0] * room_dimensions[2])
+        rt60 = 24 * np.log(10) * V / (c * S * (1 - 0.92 ** 2))
+        np.testing.assert_allclose(metrics['rt60'], rt60, rtol=0.1)
+        self.assertEqual(metrics['edc'].shape[0], len(receivers))
+        self.assertTrue(np.all(metrics['edt'] > 0))
+
+    def test_matches_schroeder_integration_of_time_rir(self):
+        """ Test the reverberation time and early decay time against Schroeder integration of the rendered (high-pass filtered) room impulse response. """
+        room_dimensions = [3.2, 4, 2.7]
+        source = [2, 3, 2]
+        receivers = [[1.1, 1, 1.2], [2.5, 1, 1.0]]
+        betas = [0.92] * 6
+        sample_frequency = 16000
+        metrics = room_metrics(receivers, source, room_dimensions, betas, sample_frequency)
+        points = metrics['edc'].shape[1]
+
+        rir = np.array(time_rir(np.array(receivers), np.array(source), room_dimensions,
+                                betas, points, sample_frequency))
+        edc = np.cumsum(rir[:, ::-1] ** 2, axis=1)[:, ::-1]
+        edc = 10 * np.log10(edc / edc[:, :1])
+        t = np.arange(points) / sample_frequency
+
+        for i, decay in enumerate(edc):
+            for metric, start, stop in [('rt60', -5, -35), ('edt', 0, -10)]:
+                mask = (decay <= start) & (decay >= stop)
+                slope = np.polyfit(t[mask], decay[mask], 1)[0]
+                np.testing.assert_allclose(metrics[metric][i], -60 / slope, rtol=0.1)
+
+    def test_clarity_and_definition_match_time_rir(self):
+        """ Test the clarity (C50) and definition (D50) against the energy of the rendered room impulse response, split 50 ms after the direct sound. """
+        room_dimensions = [3.2, 4, 2.7]
+        source = np.array([2, 3, 2])
+        receivers = np.array([[1.1, 1, 1.2], [2.5, 1, 1.0]])
+        betas = [0.92] * 6
+        sample_frequency = 16000
+        c = 304.8
+        metrics = room_metrics(receivers, source, room_dimensions, betas, sample_frequency, c=c)
+        points = metrics['edc'].shape[1]
+
+        energy = np.array(time_rir(receivers, source, room_dimensions,
+                                   betas, points, sample_frequency, c=c)) ** 2
+        onset = np.linalg.norm(receivers - source, axis=1) / c * sample_frequency
+        split = np.round(onset + 0.05 * sample_frequency).astype(int)
+        early = np.array([e[:n].sum() for e, n in zip(energy, split)])
+        late = np.array([e[n:].sum() for e, n in zip(energy, split)])
+
+        np.testing.assert_allclose(metrics['c50'], 10 * np.log10(early / late), atol=0.75)
+        np.testing.assert_allclose(metrics['d50'], early / (early + late), atol=0.04)
+
+    def test_clarity_and_definition_of_short_response(self):
+        """ Test all the energy is early when the response ends within 50 ms of the direct sound. """
+        metrics = room_metrics([[1.1, 1, 1.2]], [2, 3, 2], [3.2, 4, 2.7], [0.92] * 6, 16000, points=400)
+        np.testing.assert_equal(metrics['c50'], np.inf)
+        np.testing.assert_equal(metrics['d50'], 1)
+
+    def test_edc_is_monotonic(self):
+        """ Test the energy decay curve starts at 0 dB and never increases. """
+        metrics = room_metrics([[1, 1, 1]], [2, 3, 2], [3.2, 4, 2.7],
+                               [0.9, 0.9, 0.8, 0.8, 0.7, 0.7], 8000, order=10)
+        edc = metrics['edc'][0]
+        self.assertEqual(edc[0], 0)
+        self.assertTrue(np.all(np.diff(edc[np.isfinite(edc)]) <= 1e-9))
+
+
+if __name__ == '__main__':
+    unittest.main()
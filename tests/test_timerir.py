@@ -1,6 +1,6 @@
 import unittest
 import numpy as np
-from freqrir.timerir import time_rir
+from freqrir.timerir import time_rir, batch_time_rir
 
 
 class TestTimerir(unittest.TestCase):
@@ -15,3 +15,109 @@ class TestTimerir(unittest.TestCase):
         with self.assertRaises(ValueError):
             time_rir(source, receiver, room_dimensions,
                      betas, points, sample_frequency)
+
+    def test_2d_matches_3d_without_floor_and_ceiling(self):
+        """ Test a 2d room matches a 3d room with fully absorbing floor and ceiling. """
+        source = np.array([2, 3, 2])
+        receivers = np.array([[1.1, 1, 1.2], [2.5, 1, 1.0]])
+        room_dimensions = np.array([3.2, 4, 2.7])
+        sample_frequency = 16000
+        points = 2048
+        betas = [0.9, 0.85, 0.8, 0.75, 0, 0]
+        rir_3d = time_rir(receivers, source, room_dimensions,
+                          betas, points, sample_frequency)
+        rir_2d = time_rir(receivers, source, room_dimensions,
+                          [0.9, 0.85, 0.8, 0.75, 0.7, 0.7], points, sample_frequency, dimensions=2)
+        np.testing.assert_allclose(rir_2d, rir_3d, atol=1e-12)
+
+    def test_invalid_dimensions(self):
+        """ Test that a ValueError is raised for a room that is neither 2d or 3d. """
+        source = np.array([2, 3, 2])
+        receivers = np.array([[1, 1, 1]])
+        room_dimensions = np.array([3.2, 4, 2.7])
+        with self.assertRaises(ValueError):
+            time_rir(receivers, source, room_dimensions,
+                     [0.9] * 6, 2048, 16000, dimensions=1)
+
+    def test_gradient_matches_finite_differences(self):
+        """ Test the gradient with respect to the receiver and source against central differences. """
+        source = np.array([2., 3., 2.])
+        receivers = np.array([[1.1, 1, 1.2], [2.5, 1, 1.0]])
+        room_dimensions = np.array([3.2, 4, 2.7])
+        betas = [0.9, 0.85, 0.8, 0.75, 0.7, 0.65]
+        points, sample_frequency, order = 2048, 16000, 8
+        rir, receiver_gradient, source_gradient = time_rir(
+            receivers, source, room_dimensions, betas, points, sample_frequency, order=order, return_grad=True)
+        np.testing.assert_allclose(rir, time_rir(receivers, source, room_dimensions,
+                                                 betas, points, sample_frequency, order=order), atol=1e-12)
+        self.assertIsInstance(rir, list)  # Same type as without return_grad.
+        self.assertEqual(receiver_gradient.shape, (2, 3, points))
+        self.assertEqual(source_gradient.shape, (2, 3, points))
+
+        eps = 1e-6
+        for axis in range(3):
+            step = np.zeros(3)
+            step[axis] = eps
+            dr = (np.array(time_rir(receivers + step, source, room_dimensions, betas, points, sample_frequency, order=order)) -
+                  np.array(time_rir(receivers - step, source, room_dimensions, betas, points, sample_frequency, order=order))) / (2 * eps)
+            ds = (np.array(time_rir(receivers, source + step, room_dimensions, betas, points, sample_frequency, order=order)) -
+                  np.array(time_rir(receivers, source - step, room_dimensions, betas, points, sample_frequency, order=order))) / (2 * eps)
+            np.testing.assert_allclose(receiver_gradient[:, axis], dr, atol=1e-6)
+            np.testing.assert_allclose(source_gradient[:, axis], ds, atol=1e-6)
+
+
+class TestBatchTimerir(unittest.TestCase):
+    def setUp(self):
+        self.receivers = np.array([[[1.1, 1, 1.2], [2.5, 1, 1.0]],
+                                   [[1, 1, 1], [1.5, 2, 1]],
+                                   [[0.5, 0.5, 0.5], [3, 3, 2]]])
+        self.sources = np.array([[2, 3, 2], [2, 2, 2], [3, 1, 1]])
+        self.room_dimensions = np.array([[3.2, 4, 2.7], [3, 3, 3], [4, 5, 3]])
+        self.betas = np.array([[0.9] * 6, [0.8, 0.8, 0.7, 0.7, 0.6, 0.6], [0.5] * 6])
+        self.sample_frequency = 16000
+
+    def test_source_and_reciever_too_close(self):
+        """ Test that a ValueError is raised when the source and receiver are too close together in any room. """
+        sources = self.sources.copy()
+        sources[1] = self.receivers[1][0]
+        with self.assertRaises(ValueError):
+            batch_time_rir(self.receivers, sources, self.room_dimensions,
+                           self.betas, 512, self.sample_frequency)
+
+    def test_invalid_points_and_order(self):
+        """ Test that a ValueError is raised for a number of points or order that time_rir rejects. """
+        with self.assertRaises(ValueError):
+            batch_time_rir(self.receivers, self.sources, self.room_dimensions,
+                           self.betas, [512, -5, 512], self.sample_frequency)
+        with self.assertRaises(ValueError):
+            batch_time_rir(self.receivers, self.sources, self.room_dimensions,
+                           self.betas, 512, self.sample_frequency, order=-2)
+
+    def test_invalid_shapes(self):
+        """ Test that a ValueError is raised for betas, receivers, sources or room dimensions of the wrong shape. """
+        with self.assertRaises(ValueError):
+            batch_time_rir(self.receivers, self.sources, self.room_dimensions,
+                           self.betas[:, :3], 512, self.sample_frequency)
+        with self.assertRaises(ValueError):
+            batch_time_rir(self.receivers[:, :, :2], self.sources, self.room_dimensions,
+                           self.betas, 512, self.sample_frequency)
+        with self.assertRaises(ValueError):
+            batch_time_rir(self.receivers, self.sources[:, :2], self.room_dimensions,
+                           self.betas, 512, self.sample_frequency)
+        with self.assertRaises(ValueError):
+            batch_time_rir(self.receivers, self.sources, self.room_dimensions[:2],
+                           self.betas, 512, self.sample_frequency)
+
+    def test_matches_time_rir(self):
+        """ Test the packed room impulse responses match a call of time_rir per room. """
+        points = [512, 1024, -1]
+        order = [-1, 4, -1]
+        rirs, offsets = batch_time_rir(self.receivers, self.sources, self.room_dimensions,
+                                       self.betas, points, self.sample_frequency, order=order)
+        self.assertEqual(len(offsets), len(self.sources) + 1)
+        self.assertEqual(offsets[-1], len(rirs))
+        for k in range(len(self.sources)):
+            rir = time_rir(self.receivers[k], self.sources[k], self.room_dimensions[k],
+                           self.betas[k], points[k], self.sample_frequency, order=order[k])
+            np.testing.assert_allclose(rirs[offsets[k]:offsets[k + 1]].reshape(
+                len(self.receivers[k]), -1), rir, atol=1e-12)